@@ -4,15 +4,43 @@ import json
 import os
 import time
 import random
-import requests
 import threading
+import tomllib
 from datetime import datetime, timedelta
-from plyer import vibrator, notification
+from types import MappingProxyType
+
+# requests / plyer 只在后台拉天气、结束番茄钟时才用到，推迟到第一次使用时再导入，
+# 省下冷启动时间；导入失败会落到各自的 except 里降级
 
 
 # ==========================================
 # 1. 逻辑层 (保持不变)
 # ==========================================
+# 所有会话共用的只读文案，不再每次调用/每个实例重建一份
+QUOTES = (
+    "既然上了贼船，就做个快乐的海盗猫",
+    "与其仰望星空，不如去抓那只蝴蝶",
+    "哪怕是流浪猫，也有看夕阳的权利",
+    "保持好奇心，是猫咪长寿的秘诀",
+    "没有什么烦恼，是一个罐头解决不了的",
+    "只要步履不停，小鱼干终将抵达",
+    "现在的努力，是为了以后能躺平晒太阳",
+)
+
+CAT_FACTS = (
+    "猫咪的耳朵有32块肌肉，能转180度喵！",
+    "猫咪一天要睡12-16个小时，羡慕吧？",
+    "猫咪的肉垫会排汗，是它们唯一的汗腺。",
+    "每只猫的鼻纹都是独一无二的，像指纹一样。",
+    "猫咪尝不出甜味，所以别给朕吃糖！",
+    "猫咪即使从高处落下也能调整姿态安全着陆。",
+    "世界上最长寿的猫活了38岁！",
+    "猫咪呼噜声的频率可以促进骨骼愈合。",
+    "三花猫绝大多数都是女孩子哦。",
+    "猫咪看不清近处的东西，它是大远视眼。",
+)
+
+
 class StudyLogic:
     def __init__(self):
         self.data_file = 'station_data.json'
@@ -33,19 +61,6 @@ class StudyLogic:
         }
         self.load_data()
 
-        self.cat_facts = [
-            "猫咪的耳朵有32块肌肉，能转180度喵！",
-            "猫咪一天要睡12-16个小时，羡慕吧？",
-            "猫咪的肉垫会排汗，是它们唯一的汗腺。",
-            "每只猫的鼻纹都是独一无二的，像指纹一样。",
-            "猫咪尝不出甜味，所以别给朕吃糖！",
-            "猫咪即使从高处落下也能调整姿态安全着陆。",
-            "世界上最长寿的猫活了38岁！",
-            "猫咪呼噜声的频率可以促进骨骼愈合。",
-            "三花猫绝大多数都是女孩子哦。",
-            "猫咪看不清近处的东西，它是大远视眼。",
-        ]
-
     def load_data(self):
         if os.path.exists(self.data_file):
             try:
@@ -174,23 +189,15 @@ class StudyLogic:
         return self.data.get("last_checkin") == datetime.now().strftime("%Y-%m-%d")
 
     def get_random_quote(self):
-        quotes = [
-            "既然上了贼船，就做个快乐的海盗猫",
-            "与其仰望星空，不如去抓那只蝴蝶",
-            "哪怕是流浪猫，也有看夕阳的权利",
-            "保持好奇心，是猫咪长寿的秘诀",
-            "没有什么烦恼，是一个罐头解决不了的",
-            "只要步履不停，小鱼干终将抵达",
-            "现在的努力，是为了以后能躺平晒太阳"
-        ]
-        return random.choice(quotes)
+        return random.choice(QUOTES)
 
     def get_random_fact(self):
-        return random.choice(self.cat_facts)
+        return random.choice(CAT_FACTS)
 
     def fetch_weather(self):
         city = self.data.get("city", "郑州")
         try:
+            import requests
             url = f"https://wttr.in/{city}?format=%C+%t&lang=zh&_={int(time.time())}"
             headers = {"User-Agent": "Mozilla/5.0"}
             res = requests.get(url, timeout=10, headers=headers)
@@ -226,25 +233,172 @@ class StudyLogic:
 
 
 # ==========================================
-# 2. 界面层
+# 2. 资源索引 (启动时扫一次 assets，生成带缓存的播放清单)
+# ==========================================
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_EXTS = (".mp3", ".ogg", ".wav", ".m4a")
+# 这些文件有固定用途(铃声、保活静音、呼噜声)，不进 BGM 播放列表
+EFFECT_FILES = {"alarm.mp3", "silent.mp3", "purr.mp3"}
+
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG1 Layer III
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),  # MPEG2/2.5 Layer III
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def read_assets_dir(app_dir=APP_DIR):
+    """从 flet.toml 读 [flutter] assets_dir；仓库里放的是 flet.toml.txt，也认"""
+    for name in ("flet.toml", "flet.toml.txt"):
+        path = os.path.join(app_dir, name)
+        try:
+            with open(path, "rb") as f:
+                config = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError):
+            continue
+        return config.get("flutter", {}).get("assets_dir", "assets")
+    return "assets"
+
+
+def mp3_duration(path):
+    """只读文件头估算 MP3 时长(秒)：有 Xing/Info 头按帧数算，否则按首帧码率当 CBR 算；认不出返回 None"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(10)
+            offset = 0
+            if head[:3] == b"ID3":  # 跳过 ID3v2 标签
+                offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+            f.seek(offset)
+            buf = f.read(64 * 1024)
+    except OSError:
+        return None
+    for i in range(len(buf) - 4):
+        if buf[i] != 0xFF or (buf[i + 1] & 0xE0) != 0xE0:
+            continue
+        version = (buf[i + 1] >> 3) & 0x3  # 3=MPEG1 2=MPEG2 0=MPEG2.5
+        layer = (buf[i + 1] >> 1) & 0x3  # 1=Layer III
+        bitrate_idx = buf[i + 2] >> 4
+        rate_idx = (buf[i + 2] >> 2) & 0x3
+        if version == 1 or layer != 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+            continue
+        mpeg1 = version == 3
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (buf[i + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+        xing = i + 4 + side_info
+        if buf[xing:xing + 4] in (b"Xing", b"Info") and buf[xing + 7] & 0x1:
+            frames = int.from_bytes(buf[xing + 8:xing + 12], "big")
+            return round(frames * samples_per_frame / sample_rate, 2)
+        bitrate = _MP3_BITRATES[1 if mpeg1 else 2][bitrate_idx] * 1000
+        return round((size - offset - i) * 8 / bitrate, 2)
+    return None
+
+
+def _manifest_files_unchanged(folder, files):
+    # 原地覆盖一个文件不会改目录的 mtime，所以缓存里的几个音频文件还要各自 stat 一下
+    for entry in files:
+        try:
+            st = os.stat(os.path.join(folder, entry["file"]))
+        except (OSError, KeyError):
+            return False
+        if st.st_size != entry.get("size") or st.st_mtime != entry.get("mtime"):
+            return False
+    return True
+
+
+def load_asset_manifest(assets_dir=None, cache_file="asset_manifest.json"):
+    """扫描资源目录里的音频，结果缓存到 cache_file。
+    目录 mtime 和每个音频文件的大小、mtime 都没变就直接用缓存；否则重扫，没变的文件沿用缓存里的时长"""
+    assets_dir = assets_dir or read_assets_dir()
+    folder = os.path.join(APP_DIR, assets_dir)
+    try:
+        dir_mtime = os.stat(folder).st_mtime
+    except OSError:
+        return {"assets_dir": assets_dir, "dir_mtime": None, "files": []}
+    cached = {}
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if (cached.get("assets_dir") == assets_dir and cached.get("dir_mtime") == dir_mtime
+                and _manifest_files_unchanged(folder, cached.get("files", []))):
+            return cached
+    except (OSError, ValueError):
+        pass
+    known = {e["file"]: e for e in cached.get("files", [])}
+    files = []
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if not entry.is_file() or not entry.name.lower().endswith(AUDIO_EXTS):
+            continue
+        st = entry.stat()
+        old = known.get(entry.name)
+        if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+            files.append(old)
+            continue
+        files.append({
+            "file": entry.name,
+            "src": f"{assets_dir}/{entry.name}",
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "duration": mp3_duration(entry.path) if entry.name.lower().endswith(".mp3") else None,
+        })
+    manifest = {"assets_dir": assets_dir, "dir_mtime": dir_mtime, "files": files}
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+    return manifest
+
+
+def bgm_playlist_from_manifest(manifest):
+    playlist = []
+    for entry in manifest["files"]:
+        if entry["file"] in EFFECT_FILES:
+            continue
+        stem = os.path.splitext(entry["file"])[0]
+        playlist.append({
+            "name": f"纯音乐 {stem}" if stem.isdigit() else stem,
+            "src": entry["src"],
+            "duration": entry["duration"],
+        })
+    return playlist
+
+
+# ==========================================
+# 3. 界面层
 # ==========================================
+# 配色、表情、优先级颜色所有会话共用、只读
+THEME = MappingProxyType({
+    "bg": "#FFCCCC",
+    "fg": "#D24D57",
+    "comp_bg": "#FFF0E6",
+    "green": "#4CAF50",
+    "white": "#FFFFFF",
+    "red": "#FF5252",
+    "card_bg": "#FFFFFF",
+    "orange": "#FF9800",
+    "ring_bg": "#FFEEEE"
+})
+
+EMOJIS = MappingProxyType({
+    "idle": ("( =ω=)..zzZ", "(=^･ω･^=)", "ฅ(ﾐ・ﻌ・ﾐ)ฅ", "( -ω-)", "₍ ᐢ. ̫ .ᐢ ₎"),
+    "work": ("( * >ω<)p", "q(>ω< * )", "φ(．．;)", "(ง •̀_•́)ง", "(=`ω´=)"),
+    "break": ("( ~ o ~ )~", "旦_(^O^ )", "(=^ ◡ ^=)", "☕(・ω・)", "🧴(舔毛中)"),
+    "happy": ("(≧◡≦) ♡", "(=^･^=)♪", "(/ =ω=)/", "o(>ω<)o", "⸜( ˙˘˙)⸝"),
+    "touch": ("(///ω///)", "(=ﾟωﾟ)ﾉ", "(/ω＼)", "Meow~"),
+})
+
+PRIORITY_COLORS = MappingProxyType({"red": THEME["red"], "orange": THEME["orange"], "green": THEME["green"]})
+
+
 def main(page: ft.Page):
     page.window_width = 390
     page.window_height = 844
     page.title = "猫猫专注助手"
     page.theme_mode = ft.ThemeMode.LIGHT
 
-    THEME = {
-        "bg": "#FFCCCC",
-        "fg": "#D24D57",
-        "comp_bg": "#FFF0E6",
-        "green": "#4CAF50",
-        "white": "#FFFFFF",
-        "red": "#FF5252",
-        "card_bg": "#FFFFFF",
-        "orange": "#FF9800",
-        "ring_bg": "#FFEEEE"
-    }
     page.bgcolor = THEME["bg"]
     page.padding = 0
     page.keep_screen_on = True
@@ -258,25 +412,11 @@ def main(page: ft.Page):
     bgm_ui_enabled = False
     is_shuffle_mode = False
 
-    bgm_playlist = [
-        {"name": "纯音乐 1", "src": "assets/1.mp3"},
-        {"name": "纯音乐 2", "src": "assets/2.mp3"},
-        {"name": "纯音乐 3", "src": "assets/3.mp3"},
-        {"name": "纯音乐 4", "src": "assets/4.mp3"},
-        {"name": "纯音乐 5", "src": "assets/5.mp3"},
-        {"name": "纯音乐 6", "src": "assets/6.mp3"},
-        {"name": "纯音乐 7", "src": "assets/7.mp3"},
-    ]
+    # 往 assets 里放新的音频就会自动出现在列表里(随机播放也从这里抽)
+    asset_manifest = load_asset_manifest()
+    bgm_playlist = bgm_playlist_from_manifest(asset_manifest)
     current_bgm_index = 0
-    SILENCE_SRC = "assets/silent.mp3"
-
-    emojis = {
-        "idle": ["( =ω=)..zzZ", "(=^･ω･^=)", "ฅ(ﾐ・ﻌ・ﾐ)ฅ", "( -ω-)", "₍ ᐢ. ̫ .ᐢ ₎"],
-        "work": ["( * >ω<)p", "q(>ω< * )", "φ(．．;)", "(ง •̀_•́)ง", "(=`ω´=)"],
-        "break": ["( ~ o ~ )~", "旦_(^O^ )", "(=^ ◡ ^=)", "☕(・ω・)", "🧴(舔毛中)"],
-        "happy": ["(≧◡≦) ♡", "(=^･^=)♪", "(/ =ω=)/", "o(>ω<)o", "⸜( ˙˘˙)⸝"],
-        "touch": ["(///ω///)", "(=ﾟωﾟ)ﾉ", "(/ω＼)", "Meow~"]
-    }
+    SILENCE_SRC = f"{asset_manifest['assets_dir']}/silent.mp3"
 
     # 🔊 音频初始化
     audio_alarm = flet_audio.Audio(src="assets/purr.mp3", autoplay=False)
@@ -326,7 +466,7 @@ def main(page: ft.Page):
     # ---------------------------------------------------
     def update_bgm_playback():
         audio_bg.pause()
-        if bgm_ui_enabled:
+        if bgm_ui_enabled and bgm_playlist:
             audio_bg.src = bgm_playlist[current_bgm_index]["src"]
         else:
             audio_bg.src = SILENCE_SRC
@@ -337,12 +477,14 @@ def main(page: ft.Page):
 
     def trigger_vibration():
         try:
+            from plyer import vibrator
             vibrator.vibrate(2)
         except:
             pass
 
     def send_notification(title, message):
         try:
+            from plyer import notification
             notification.notify(title=title, message=message, app_name="猫猫专注", timeout=10)
         except:
             pass
@@ -382,6 +524,10 @@ def main(page: ft.Page):
             page.snack_bar = ft.SnackBar(ft.Text("先打开音乐喵~"), open=True)
             page.update()
             return
+        if not bgm_playlist:
+            page.snack_bar = ft.SnackBar(ft.Text("资源目录里没有找到背景音乐喵~"), open=True)
+            page.update()
+            return
 
         if is_shuffle_mode:
             if len(bgm_playlist) > 1:
@@ -440,7 +586,7 @@ def main(page: ft.Page):
             btn_skip.visible = True
 
             fact = logic.get_random_fact()
-            txt_cat.value = random.choice(emojis["break"])
+            txt_cat.value = random.choice(EMOJIS["break"])
 
             dlg_fact = ft.AlertDialog(
                 title=ft.Text("🐱 猫猫冷知识"),
@@ -462,7 +608,7 @@ def main(page: ft.Page):
             btn_start.bgcolor = THEME["white"]
             btn_start.color = THEME["fg"]
             btn_skip.visible = False
-            txt_cat.value = random.choice(emojis["idle"])
+            txt_cat.value = random.choice(EMOJIS["idle"])
             msg = "睡醒了，准备继续抓鱼！"
             page.snack_bar = ft.SnackBar(ft.Text(msg), open=True)
             send_notification("休息结束", msg)
@@ -591,7 +737,7 @@ def main(page: ft.Page):
     def checkin_click(e):
         success, msg = logic.check_in()
         refresh_checkin_ui()
-        if success: txt_cat.value = random.choice(emojis["happy"])
+        if success: txt_cat.value = random.choice(EMOJIS["happy"])
         page.snack_bar = ft.SnackBar(ft.Text(msg), open=True)
         page.update()
 
@@ -616,7 +762,7 @@ def main(page: ft.Page):
     )
 
     txt_timer_title = ft.Text("准备捕猎", size=16, weight="bold", color=THEME["fg"])
-    txt_cat = ft.Text(random.choice(emojis["idle"]), size=18, color=THEME["fg"])
+    txt_cat = ft.Text(random.choice(EMOJIS["idle"]), size=18, color=THEME["fg"])
     txt_timer = ft.Text(f"{logic.data['focus_min']}:00", size=50, weight="bold", color=THEME["fg"],
                         font_family="Impact")
 
@@ -679,7 +825,7 @@ def main(page: ft.Page):
         btn_start.text = "开始捕猎"
         btn_start.bgcolor = THEME["white"]
         btn_skip.visible = False
-        txt_cat.value = random.choice(emojis["idle"])
+        txt_cat.value = random.choice(EMOJIS["idle"])
         try:
             audio_bg.pause()
         except:
@@ -704,7 +850,7 @@ def main(page: ft.Page):
                          opacity=0.8)
 
     def pet_the_cat(e):
-        txt_cat.value = random.choice(emojis["touch"])
+        txt_cat.value = random.choice(EMOJIS["touch"])
         txt_cat.color = THEME["orange"]
         txt_cat.update()
         trigger_vibration()
@@ -724,7 +870,7 @@ def main(page: ft.Page):
         time.sleep(0.5)
         txt_cat.color = THEME["fg"]
         if not timer_running:
-            txt_cat.value = random.choice(emojis["idle"])
+            txt_cat.value = random.choice(EMOJIS["idle"])
         txt_cat.update()
 
     stack_timer_display.controls[2].on_click = pet_the_cat
@@ -743,7 +889,7 @@ def main(page: ft.Page):
                 ft.Text("今日战绩", size=16, color=THEME["fg"]),
                 ft.Text(f"{tomato_count}", size=80, weight="bold", color=THEME["fg"], font_family="Impact"),
                 ft.Text(f"条小鱼干 ({focus_minutes}分钟)", size=14, color="grey"),
-                ft.Container(height=20), ft.Text(random.choice(emojis["happy"]), size=40, color=THEME["fg"]),
+                ft.Container(height=20), ft.Text(random.choice(EMOJIS["happy"]), size=40, color=THEME["fg"]),
                 ft.Container(height=20), ft.Container(
                     content=ft.Text(txt_slogan.value, italic=True, text_align="center", color=THEME["fg"], size=14),
                     padding=10),
@@ -791,7 +937,7 @@ def main(page: ft.Page):
         if not timer_running:
             timer_running = True
             btn_start.text = "爪下留情(暂停)"
-            txt_cat.value = random.choice(emojis["work"])
+            txt_cat.value = random.choice(EMOJIS["work"])
 
             update_bgm_playback()
 
@@ -813,7 +959,7 @@ def main(page: ft.Page):
         else:
             timer_running = False
             btn_start.text = "继续捕猎"
-            txt_cat.value = random.choice(emojis["idle"])
+            txt_cat.value = random.choice(EMOJIS["idle"])
             try:
                 audio_bg.pause()
             except:
@@ -929,7 +1075,6 @@ def main(page: ft.Page):
         if not dlg_event_date.value: dlg_event_date.value = datetime.now().strftime("%Y-%m-%d")
         page.open(dlg_add_event)
 
-    priority_map = {"red": THEME["red"], "orange": THEME["orange"], "green": THEME["green"]}
     current_priority = "green"
 
     def set_priority(color):
@@ -980,7 +1125,7 @@ def main(page: ft.Page):
                     text = task_item
                     prio = "green"
 
-                p_icon = ft.Icon(ft.Icons.CIRCLE, size=12, color=priority_map.get(prio, THEME["green"]))
+                p_icon = ft.Icon(ft.Icons.CIRCLE, size=12, color=PRIORITY_COLORS.get(prio, THEME["green"]))
                 display_content = [p_icon, ft.Text(text, size=14, color=THEME["fg"], expand=True)]
                 if prio == "red":
                     display_content.insert(1, ft.Text("🔥", size=12))
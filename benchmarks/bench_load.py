@@ -0,0 +1,228 @@
+"""多会话压测：一个进程里开 N 个假会话，各自按真实节奏点按钮，统计吞吐、处理函数延迟、线程数、每会话内存和存盘频率。
+
+    python benchmarks/bench_load.py --sessions 50 --duration 30
+    python benchmarks/bench_load.py --sessions 200 --think-ms 200 --cycle-seconds 2
+
+每个会话一个驱动线程：开始/暂停计时(计时改成几秒，真的会跑完一轮)、加删待办、按爪签到、改设置，
+两次操作之间随机“想一会儿”(指数分布，均值 --think-ms)。所有会话和真实部署一样共用同一个数据文件。
+延迟分两种：handler 是 on_click 本身的耗时，settled 还包括这一步的刷新全部发出去。
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+from fake_page import Event, close_page, make_page, one, wait_warm_up, walk
+from synthetic import add_size_args, sizes_from_args, write_profile
+
+import flet as ft
+from diagnostics import metrics, percentiles
+
+ACTIONS = {  # 操作 -> 权重
+    "start_cycle": 3,
+    "pause_resume": 2,
+    "add_task": 4,
+    "remove_task": 3,
+    "check_in": 1,
+    "save_settings": 1,
+}
+
+
+def rss_kb():
+    """当前常驻内存；没有 /proc 的系统退回到历史峰值"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class SimSession:
+    """一个模拟用户：开会话、把三个页面都建出来，然后按权重随机操作"""
+
+    def __init__(self, app, index, args, recorder):
+        self.args = args
+        self.recorder = recorder
+        self.rng = random.Random(args.seed + index)
+        self.page, _ = make_page(f"load-{index}")
+        app.main(self.page)
+        page = self.page
+        self.ui = page.session.get("ui_batcher")
+        wait_warm_up(page)
+        self.nav = one(page, lambda c: isinstance(c, ft.NavigationBar), "导航栏")
+        for index in (1, 2, 0):  # 待办页和设置页首次切过去才构建
+            self.nav.selected_index = index
+            self.nav.on_change(Event(self.nav))
+        self.ui.wait_idle()
+        self.txt_timer = one(page, lambda c: isinstance(c, ft.Text) and c.size == 50, "倒计时")
+        self.btn_start = one(page, lambda c: isinstance(c, ft.ElevatedButton) and c.text == "开始捕猎", "开始按钮")
+        self.btn_checkin = one(page, lambda c: isinstance(c, ft.ElevatedButton) and "按爪" in (c.text or ""), "签到")
+        self.lv_tasks = one(page, lambda c: isinstance(c, ft.ListView) and c.spacing == 5, "待办列表")
+        self.task_field = one(page, lambda c: isinstance(c, ft.TextField) and c.hint_text == "输入待办...", "待办输入框")
+        self.btn_add = one(page, lambda c: isinstance(c, ft.IconButton) and c.icon == "add_circle", "添加按钮")
+        self.input_name = one(page, lambda c: isinstance(c, ft.TextField) and c.label == "猎物名称", "猎物名称")
+        self.btn_save = one(page, lambda c: isinstance(c, ft.ElevatedButton) and c.text == "保存设置喵", "保存设置")
+        self.added = 0
+
+    def click(self, action, control):
+        t = time.perf_counter()
+        control.on_click(Event(control))
+        handled = time.perf_counter()
+        self.ui.wait_idle()
+        self.recorder.record(action, handled - t, time.perf_counter() - t)
+
+    def step(self):
+        action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        running = self.btn_start.text == "爪下留情(暂停)"
+        if action == "start_cycle" and not running:
+            self.txt_timer.value = f"00:{self.args.cycle_seconds:02d}"
+            self.click(action, self.btn_start)
+        elif action == "pause_resume" and running:
+            self.click(action, self.btn_start)
+            self.click(action, self.btn_start)
+        elif action == "add_task":
+            self.added += 1
+            self.task_field.value = f"压测任务 {self.added}"
+            self.click(action, self.btn_add)
+        elif action == "remove_task":
+            buttons = [c for row in list(self.lv_tasks.controls) for c in walk(row)
+                       if isinstance(c, ft.IconButton) and c.icon == "delete_outline"]
+            if buttons:
+                self.click(action, self.rng.choice(buttons))
+        elif action == "check_in":
+            self.click(action, self.btn_checkin)
+        elif action == "save_settings":
+            self.input_name.value = self.rng.choice(["上岸", "考研", "雅思", "毕业"])
+            self.click(action, self.btn_save)
+
+    def run(self, stop):
+        while not stop.is_set():
+            self.step()
+            stop.wait(self.rng.expovariate(1000 / self.args.think_ms) if self.args.think_ms else 0)
+
+    def close(self):
+        close_page(self.page)
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.handler = {}
+        self.settled = {}
+
+    def record(self, action, handler_s, settled_s):
+        with self._lock:
+            self.handler.setdefault(action, []).append(handler_s * 1000)
+            self.settled.setdefault(action, []).append(settled_s * 1000)
+
+    def summary(self):
+        def rounded(p):
+            return {k: round(v, 2) if k != "n" else v for k, v in p.items()}
+        with self._lock:
+            every_handler = [x for s in self.handler.values() for x in s]
+            every_settled = [x for s in self.settled.values() for x in s]
+            out = {a: {"handler_ms": rounded(percentiles(self.handler[a])),
+                       "settled_ms": rounded(percentiles(self.settled[a]))} for a in sorted(self.handler)}
+        out["ALL"] = {"handler_ms": rounded(percentiles(every_handler)) if every_handler else None,
+                      "settled_ms": rounded(percentiles(every_settled)) if every_settled else None}
+        return out, len(every_handler)
+
+
+def saves():
+    snap = metrics.snapshot().get("tomato_save_seconds", {}).get("")
+    return (snap["count"], snap["sum"]) if snap else (0, 0.0)
+
+
+def run(args):
+    os.chdir(tempfile.mkdtemp(prefix="tomato-load-"))
+    write_profile("station_data.json", **sizes_from_args(args))
+    import main as app
+    app.StudyLogic.fetch_weather = lambda self: f"{self.data.get('city', '')} 晴 20°C"
+
+    # 先开关一个会话，把各种导入和模块级缓存的一次性开销排除在“每会话内存”之外
+    recorder = Recorder()
+    SimSession(app, -1, args, recorder).close()
+    gc.collect()
+    threads_idle, rss_before = threading.active_count(), rss_kb()
+
+    t = time.perf_counter()
+    sessions = [SimSession(app, i, args, recorder) for i in range(args.sessions)]
+    open_s = time.perf_counter() - t
+    gc.collect()
+    rss_open = rss_kb()
+
+    stop = threading.Event()
+    thread_samples = []
+    drivers = [threading.Thread(target=s.run, args=(stop,), daemon=True) for s in sessions]
+    saves_before = saves()
+    started = time.perf_counter()
+    for d in drivers:
+        d.start()
+    while time.perf_counter() - started < args.duration:
+        time.sleep(0.5)
+        thread_samples.append(threading.active_count() - len(drivers))  # 驱动线程不算应用的
+    stop.set()
+    for d in drivers:
+        d.join()
+    elapsed = time.perf_counter() - started
+    saves_after = saves()
+    rss_end = rss_kb()
+
+    for s in sessions:
+        s.close()
+    time.sleep(0.3)  # 只等计时线程的一次轮询(0.1 秒)；比一轮短得多，哪个线程没跟着会话退出这里就能看出来
+    threads_after_close = threading.active_count()
+
+    latency, actions = recorder.summary()
+    writes = saves_after[0] - saves_before[0]
+    file_kb = os.path.getsize("station_data.json") / 1024
+    return {
+        "sizes": sizes_from_args(args),
+        "sessions": args.sessions,
+        "duration_s": round(elapsed, 1),
+        "open_sessions_s": round(open_s, 2),
+        "actions": actions,
+        "actions_per_s": round(actions / elapsed, 1),
+        "latency": latency,
+        "threads": {"idle": threads_idle, "peak": max(thread_samples, default=0),
+                    "per_session": round((max(thread_samples, default=threads_idle) - threads_idle) / args.sessions, 2),
+                    "after_close": threads_after_close},
+        "memory_kb": {"per_session_open": round((rss_open - rss_before) / args.sessions, 1),
+                      "per_session_after_run": round((rss_end - rss_before) / args.sessions, 1),
+                      "rss_end": rss_end},
+        "storage": {"writes": writes, "writes_per_s": round(writes / elapsed, 2),
+                    "kb_per_s": round(writes * file_kb / elapsed, 1), "file_kb": round(file_kb, 1),
+                    "save_ms_avg": round((saves_after[1] - saves_before[1]) / writes * 1000, 2) if writes else None},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_args(parser)
+    parser.add_argument("--sessions", type=int, default=20, help="同时在线的会话数")
+    parser.add_argument("--duration", type=float, default=20, help="压多少秒")
+    parser.add_argument("--think-ms", type=float, default=500, help="两次操作之间平均间隔(毫秒)，0 表示不停手")
+    parser.add_argument("--cycle-seconds", type=int, default=3, help="每轮专注/休息缩短成几秒")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="把结果写成 JSON")
+    args = parser.parse_args()
+    if args.save:
+        args.save = os.path.abspath(args.save)
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
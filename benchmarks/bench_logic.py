@@ -0,0 +1,181 @@
+"""StudyLogic 各操作在大数据量下的耗时分位数和内存峰值。
+
+    python benchmarks/bench_logic.py --days 1500 --history 30000 --tasks 3000 --countdowns 1000
+    python benchmarks/bench_logic.py --save base.json          # 记下基线
+    python benchmarks/bench_logic.py --baseline base.json      # 逐项对比，中位数或内存峰值超出 --tolerance 就返回 1
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import add_size_args, sizes_from_args, write_profile
+
+import fake_page  # noqa: F401  (把仓库根目录放进 sys.path)
+
+
+def percentile(sorted_samples, q):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+def summarize(samples):
+    s = sorted(samples)
+    return {"p50": round(statistics.median(s), 4), "p90": round(percentile(s, 0.9), 4),
+            "p99": round(percentile(s, 0.99), 4), "max": round(s[-1], 4), "n": len(s)}
+
+
+def make_operations(app, logic):
+    """每个操作是 (准备, 被测函数)；准备部分不计时"""
+    task_ids = [t.id for t in logic.iter_tasks()]
+    target = logic.data["target_date"]
+
+    def prepare_check_in():
+        logic.data["last_checkin"] = app.day_clock.yesterday_str
+
+    def remove_task():
+        if task_ids:
+            logic.remove_task(task_ids.pop())
+
+    return {
+        "load_data": (None, lambda: app.StudyLogic()),
+        "save_data": (None, logic.save_data),
+        "increment_tomato": (None, logic.increment_tomato),
+        "remove_task": (None, remove_task),
+        "check_in": (prepare_check_in, logic.check_in),
+        "get_weekly_data": (None, logic.get_weekly_data),
+        "calculate_days": (None, lambda: logic.calculate_days(target)),
+        "search_history": (None, lambda: logic.search_history("番茄")),
+        "focus_model": (lambda: setattr(logic, "_focus_model", None), logic.focus_model),
+    }
+
+
+# 历史检索的回归检查：结果必须和逐条按原文包含扫一遍完全一样。
+# 这几条专门覆盖半个英文词/数字("12" 要搜到 "第112章"、"chapter12")和带冒号的时间("12:3")
+SEARCH_CHECK_ENTRIES = ("[09:00] 复习第112章", "[10:00] chapter12 done", "[12:34] 捕获一只番茄",
+                        "[11:00] 3 个番茄", "[12:00] 12 apples")
+SEARCH_CHECK_QUERIES = ("12", "12:3", "番茄", "第112章", "chapter12", "3 个", "12 apples", "喵喵不存在")
+
+
+def check_search(logic):
+    """返回和逐条扫描结果不一致的查询"""
+    logic.search_history("番茄")  # 先把索引建起来，下面的条目走增量索引
+    for entry in SEARCH_CHECK_ENTRIES:
+        logic.add_history(entry)
+    history = logic.data["history"]
+    wrong = []
+    for query in SEARCH_CHECK_QUERIES:
+        expected = [i for i in range(len(history) - 1, -1, -1) if query.lower() in history[i].lower()]
+        if list(logic.search_history(query)) != expected:
+            wrong.append(query)
+    return wrong
+
+
+def time_operation(prepare, fn, runs):
+    samples = []
+    for _ in range(runs):
+        if prepare:
+            prepare()
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return samples
+
+
+def peak_memory_kb(prepare, fn):
+    """单次调用期间比调用前多占的内存峰值"""
+    if prepare:
+        prepare()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        return round((tracemalloc.get_traced_memory()[1] - before) / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run(args):
+    os.chdir(tempfile.mkdtemp(prefix="tomato-bench-"))
+    write_profile("station_data.json", **sizes_from_args(args))
+    import main as app
+    app.StudyLogic.fetch_weather = lambda self: "晴"
+
+    logic = app.StudyLogic()
+    search_wrong = check_search(logic)
+    ops = make_operations(app, logic)
+    if args.only:
+        ops = {k: v for k, v in ops.items() if k in args.only}
+    result = {"sizes": sizes_from_args(args), "runs": args.runs,
+              "file_kb": round(os.path.getsize("station_data.json") / 1024, 1),
+              "search_check": search_wrong or "ok", "ops": {}}
+    for name, (prepare, fn) in ops.items():
+        fn()  # 预热：lru_cache、懒建的索引等
+        stats = summarize(time_operation(prepare, fn, args.runs))
+        stats["peak_kb"] = peak_memory_kb(prepare, fn)
+        result["ops"][name] = stats
+    return result
+
+
+def compare(base, result, tolerance):
+    """打印对比表，返回退化了的操作名"""
+    regressed = []
+    print(f"{'操作':<18}{'基线 p50':>12}{'本次 p50':>12}{'变化':>9}{'基线峰值KB':>14}{'本次峰值KB':>14}")
+    for name, now in result["ops"].items():
+        old = base["ops"].get(name)
+        if old is None:
+            print(f"{name:<18}{'-':>12}{now['p50']:>12}")
+            continue
+        change = (now["p50"] - old["p50"]) / old["p50"] if old["p50"] else 0.0
+        mark = ""
+        # 特别快的操作抖动占比大，差不到 0.05 ms 不算退化
+        if change > tolerance and now["p50"] - old["p50"] > 0.05:
+            mark = "  ← 变慢"
+            regressed.append(name)
+        if now["peak_kb"] > old["peak_kb"] * (1 + tolerance) + 16:
+            mark += "  ← 内存"
+            regressed.append(name)
+        print(f"{name:<18}{old['p50']:>12}{now['p50']:>12}{change:>+9.0%}"
+              f"{old['peak_kb']:>14}{now['peak_kb']:>14}{mark}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_args(parser)
+    parser.add_argument("--runs", type=int, default=30, help="每个操作计时多少次")
+    parser.add_argument("--only", nargs="+", help="只测这几个操作")
+    parser.add_argument("--save", help="把结果写成基线 JSON")
+    parser.add_argument("--baseline", help="和这个基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许比基线差的比例")
+    args = parser.parse_args()
+    for name in ("save", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result["search_check"] != "ok":
+        print("历史检索结果和逐条扫描不一致: " + ", ".join(result["search_check"]))
+        return 1
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("sizes") != result["sizes"]:
+            print(f"注意：数据规模和基线不同 ({base.get('sizes')} vs {result['sizes']})")
+        regressed = compare(base, result, args.tolerance)
+        if regressed:
+            print("退化: " + ", ".join(sorted(set(regressed))))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
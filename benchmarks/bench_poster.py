@@ -0,0 +1,74 @@
+"""分享海报渲染基准：冷渲染(画图 + 写 PNG)和命中内容缓存的耗时。
+
+    python benchmarks/bench_poster.py --runs 20
+    python benchmarks/bench_poster.py --font /path/to/NotoSansCJK-Regular.ttc   # 本机没有中文字体时指定一个
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import fake_page  # noqa: F401  (把仓库根目录放进 sys.path)
+
+
+def timed_ms(fn):
+    t = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - t) * 1000, result
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "median": round(statistics.median(samples), 3),
+        "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max": round(samples[-1], 3),
+    }
+
+
+def run(args):
+    os.chdir(tempfile.mkdtemp(prefix="tomato-poster-"))
+    import main as app
+    if args.font:
+        app.find_cjk_font = lambda: args.font
+    font_ms, font_path = timed_ms(app.find_cjk_font)
+    if font_path is None:
+        return {"error": "没有 Pillow(pip install pillow) 或找不到能显示中文的字体：用 --font 指定，"
+                         "或把字体文件放进 assets 目录"}
+
+    base = {"date": "2026年10月19日", "weekday": "周一", "minutes": 0, "emoji": "(=^･^=)♪",
+            "quote": "只要步履不停\n小鱼干终将抵达", "brand": "猫猫专注助手", "fg": "#D24D57", "bg": "#FFFFFF"}
+    posters = [dict(base, tomatoes=i, minutes=i * 25) for i in range(args.runs)]
+    cold, warm, sizes = [], [], []
+    for poster in posters:
+        ms, path = timed_ms(lambda: app.render_share_poster(poster, keep=args.runs))
+        cold.append(ms)
+        sizes.append(os.path.getsize(path))
+    for poster in posters:
+        warm.append(timed_ms(lambda: app.render_share_poster(poster, keep=args.runs))[0])
+    return {
+        "font": font_path,
+        "font_lookup_ms": round(font_ms, 3),
+        "cold_ms": summarize(cold),
+        "cached_ms": summarize(warm),
+        "png_kb_median": round(statistics.median(sizes) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="渲染多少张内容不同的海报")
+    parser.add_argument("--font", help="直接用这个字体文件(不检查能否显示中文)")
+    args = parser.parse_args()
+    if args.font:
+        args.font = os.path.abspath(args.font)
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 1 if "error" in result else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""任务/倒计时/历史记录占多少内存：同一份数据按 JSON 原样(字典和字符串)放着，和 StudyLogic 加载成记录对象后比。
+
+    python benchmarks/bench_record_memory.py --tasks 20000 --history 50000 --countdowns 5000
+    python benchmarks/bench_record_memory.py --sessions 3     # 同一进程里再多加载几份，看后面每份多占多少
+
+json_kb 是 json.load 出来的三个列表本身，相当于以前内存里的样子(不含索引，所以比以前实际占的还少)；
+logic_kb 是一个 StudyLogic 加载完后留下的全部(记录、索引、其余设置)。
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from synthetic import add_size_args, sizes_from_args, write_profile
+
+import fake_page  # noqa: F401  (把仓库根目录放进 sys.path)
+
+RECORD_KEYS = ("tasks", "countdowns", "history")
+
+
+def retained_kb(build):
+    """build() 返回的对象在 gc 之后还占着的内存；返回 (KB, 对象)，对象留给调用方决定何时释放"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        gc.collect()
+        return round(tracemalloc.get_traced_memory()[0] / 1024, 1), obj
+    finally:
+        tracemalloc.stop()
+
+
+def run(args):
+    os.chdir(tempfile.mkdtemp(prefix="tomato-records-"))
+    write_profile("station_data.json", **sizes_from_args(args))
+    import main as app
+    app.StudyLogic.fetch_weather = lambda self: "晴"
+    app.StudyLogic()  # 预热：导入、正则编译等一次性开销
+
+    def load_records():
+        with open("station_data.json", encoding="utf-8") as f:
+            data = json.load(f)
+        return {k: data[k] for k in RECORD_KEYS}
+
+    records = sum(len(v) for v in load_records().values())
+    json_kb, raw = retained_kb(load_records)
+    del raw
+    sessions, logic_kb = [], []
+    for _ in range(args.sessions):
+        kb, logic = retained_kb(app.StudyLogic)
+        sessions.append(logic)  # 前一份留着，后面几份才能看出字符串共用的效果
+        logic_kb.append(kb)
+    return {
+        "sizes": sizes_from_args(args),
+        "records": records,
+        "json_kb": json_kb,
+        "logic_kb": logic_kb,
+        "bytes_per_record": {"json": round(json_kb * 1024 / records), "logic": round(logic_kb[0] * 1024 / records),
+                             "logic_next_session": round(logic_kb[-1] * 1024 / records)},
+        "logic_vs_json": f"{logic_kb[0] / json_kb - 1:+.0%}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_args(parser)
+    parser.set_defaults(tasks=20000, history=50000, countdowns=5000, days=1500)
+    parser.add_argument("--sessions", type=int, default=2, help="依次加载几份 StudyLogic")
+    args = parser.parse_args()
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
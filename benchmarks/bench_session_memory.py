@@ -0,0 +1,103 @@
+"""每个会话占多少内存：用 tracemalloc 数开 N 个假会话前后多出来的分配，按文件和 main.py 的行排出大头。
+
+    python benchmarks/bench_session_memory.py --sessions 20
+    python benchmarks/bench_session_memory.py --save mem_base.json
+    python benchmarks/bench_session_memory.py --baseline mem_base.json   # 每会话字节数超出 --tolerance 就返回 1
+
+和 bench_load 的 RSS 不同，这里只数 Python 对象，不受分配器缓存影响，前后两次的差能看出几 KB 的变化。
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from fake_page import close_page, make_page, wait_warm_up
+from synthetic import add_size_args, sizes_from_args, write_profile
+
+
+def wait_ready(page):
+    wait_warm_up(page)
+    page.session.get("ui_batcher").wait_idle()
+
+
+def open_session(app, name):
+    page, _ = make_page(name)
+    app.main(page)
+    wait_ready(page)
+    return page
+
+
+def run(args):
+    os.chdir(tempfile.mkdtemp(prefix="tomato-mem-"))
+    write_profile("station_data.json", **sizes_from_args(args))
+    import main as app
+    app.StudyLogic.fetch_weather = lambda self: "晴"
+    main_file = os.path.abspath(app.__file__)
+
+    close_page(open_session(app, "primer"))  # 导入、模块级缓存等一次性开销不算
+    gc.collect()
+    tracemalloc.start(1)
+    before = tracemalloc.take_snapshot()
+    pages = [open_session(app, f"mem-{i}") for i in range(args.sessions)]
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    def top(key_type, keep, only=None):
+        rows = []
+        for diff in after.compare_to(before, key_type):
+            frame = diff.traceback[0]
+            if only and frame.filename != only:
+                continue
+            where = os.path.basename(frame.filename) + (f":{frame.lineno}" if key_type == "lineno" else "")
+            rows.append({"where": where, "kb_per_session": round(diff.size_diff / args.sessions / 1024, 2)})
+            if len(rows) == keep:
+                break
+        return rows
+
+    total = sum(d.size_diff for d in after.compare_to(before, "filename"))
+    result = {
+        "sizes": sizes_from_args(args),
+        "sessions": args.sessions,
+        "kb_per_session": round(total / args.sessions / 1024, 1),
+        "by_file": top("filename", 10),
+        "main_py_lines": top("lineno", args.lines, main_file),
+    }
+    for page in pages:
+        close_page(page)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_args(parser)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=15, help="列出 main.py 里分配最多的几行")
+    parser.add_argument("--save", help="把结果写成基线 JSON")
+    parser.add_argument("--baseline", help="和这个基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="允许比基线多的比例")
+    args = parser.parse_args()
+    for name in ("save", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        old, now = base["kb_per_session"], result["kb_per_session"]
+        print(f"每会话 {old} KB -> {now} KB ({(now - old) / old:+.1%})")
+        if now > old * (1 + args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
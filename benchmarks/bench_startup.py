@@ -0,0 +1,129 @@
+"""冷启动基准：导入 main.py 的耗时分解 + main(page) 到第一次 page.add 的时间(首帧)。
+
+每一轮先删掉首页快照测一次冷启动，再用它刚写下的快照测一次热启动，两者分开报告。
+
+    python benchmarks/bench_startup.py --tasks 5000 --history 20000 --runs 5
+    python benchmarks/bench_startup.py --save base.json        # 记下基线
+    python benchmarks/bench_startup.py --baseline base.json    # 比基线慢超过 --tolerance 就返回 1
+    python benchmarks/bench_startup.py --cold-imports          # 另起干净的解释器测各依赖的导入耗时
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_page import close_page, make_page, wait_warm_up
+from synthetic import add_size_args, sizes_from_args, write_profile
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLD_IMPORT_MODULES = ("flet", "flet_audio", "requests", "plyer", "main")
+SNAPSHOT_FILE = "home_snapshot.json"  # 同 StudyLogic.snapshot_file
+
+
+def cold_import_ms(module, repeat=3):
+    """在全新的解释器里导入一次，取几次里最快的"""
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+        if out.returncode != 0:
+            return None
+        ms = float(out.stdout.strip().splitlines()[-1])
+        best = ms if best is None else min(best, ms)
+    return round(best, 2)
+
+
+def start_once(app, phases):
+    page, conn = make_page()
+    start = time.perf_counter()
+    app.main(page)
+    ttff = (conn.first_add_at - start) * 1000
+    wait_warm_up(page)  # 完整数据加载完、快照写下之后再关，免得拖进下一轮
+    for p in page.session.get("startup_trace").report()["phases"]:
+        if p["ms"] is not None:
+            phases.setdefault(p["phase"], []).append(p["ms"])
+    close_page(page)
+    return ttff
+
+
+def summarize(ttff, phases):
+    return {
+        "ttff_ms_median": round(statistics.median(ttff), 2),
+        "ttff_ms_max": round(max(ttff), 2),
+        "main_phases_median": {k: round(statistics.median(v), 2) for k, v in phases.items()},
+    }
+
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="tomato-bench-")
+    os.chdir(work_dir)  # StudyLogic 读写当前目录下的 station_data.json
+    write_profile("station_data.json", **sizes_from_args(args))
+
+    t0 = time.perf_counter()
+    import main as app
+    import diagnostics
+    import_ms = (time.perf_counter() - t0) * 1000
+    # 基准里不走网络
+    app.StudyLogic.fetch_weather = lambda self: f"{self.data.get('city', '')} 晴 20°C"
+
+    # 冷启动：没有首页快照，首帧前要读完整个数据文件；热启动：用上一次冷启动写下的快照
+    cold, warm = ([], {}), ([], {})
+    for _ in range(args.runs):
+        if os.path.exists(SNAPSHOT_FILE):
+            os.remove(SNAPSHOT_FILE)
+        cold[0].append(start_once(app, cold[1]))
+        warm[0].append(start_once(app, warm[1]))
+
+    return {
+        "sizes": sizes_from_args(args),
+        "import_ms": round(import_ms, 2),
+        "import_phases": {p["phase"]: p["ms"] for p in diagnostics.import_trace.report()["phases"]},
+        "cold": summarize(*cold),
+        "warm": summarize(*warm),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_args(parser)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--save", help="把结果写成基线 JSON")
+    parser.add_argument("--baseline", help="和这个基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许比基线慢的比例")
+    parser.add_argument("--cold-imports", action="store_true", help="测量各依赖和 main.py 的冷导入耗时")
+    args = parser.parse_args()
+    for name in ("save", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    result = run(args)
+    if args.cold_imports:
+        result["cold_import_ms"] = {m: cold_import_ms(m) for m in COLD_IMPORT_MODULES}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        slower = False
+        for kind in ("cold", "warm"):
+            if kind not in base:
+                continue
+            base_ms, ms = base[kind]["ttff_ms_median"], result[kind]["ttff_ms_median"]
+            limit = base_ms * (1 + args.tolerance)
+            if ms > limit:
+                print(f"{kind} 首帧变慢: {ms} ms > {limit:.2f} ms (基线 {base_ms} ms)")
+                slower = True
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
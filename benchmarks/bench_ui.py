@@ -0,0 +1,165 @@
+"""无界面 UI 基准：用假 Page 跑 main(page)，按场景统计刷新次数、对比的控件数和发出去的字节数。
+
+    python benchmarks/bench_ui.py                        # 跑全部场景
+    python benchmarks/bench_ui.py --only tabs reports
+    python benchmarks/bench_ui.py --save ui_base.json
+    python benchmarks/bench_ui.py --baseline ui_base.json   # 次数/控件数/字节数超出 --tolerance 就返回 1
+
+计时场景 focus_cycle 把倒计时改成几秒再开始，真实地跑完一轮专注和休息。
+add_tasks 另外给出每加一条的耗时(add_ms，含刷新发完)和对比的控件数(diffed_per_add)；
+换 --tasks 10 / --tasks 5000 各跑一次，看加一条的开销是否随已有任务数增长。
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fake_page import Event, close_page, instrument_updates, make_page, one, wait_for, wait_warm_up
+from synthetic import add_size_args, sizes_from_args, write_profile
+
+import flet as ft
+from diagnostics import percentiles, timer_drift
+
+GATED = ("updates", "diffed", "controls", "bytes")  # 这几项可重复，拿来卡回归；耗时只做参考
+
+
+def click(control, ui):
+    # 每步操作后等刷新发完再走下一步，刷新次数才可复现(不然取决于两次点击落在不在同一帧)
+    control.on_click(Event(control))
+    ui.wait_idle()
+
+
+def nav_to(page, ui, index):
+    nav = one(page, lambda c: isinstance(c, ft.NavigationBar), "导航栏")
+    nav.selected_index = index
+    nav.on_change(Event(nav))
+    ui.wait_idle()
+
+
+def scenario_focus_cycle(page, ui, args):
+    txt_timer = one(page, lambda c: isinstance(c, ft.Text) and c.size == 50, "倒计时")
+    btn_start = one(page, lambda c: isinstance(c, ft.ElevatedButton) and c.text == "开始捕猎", "开始按钮")
+    for _ in range(2):  # 一轮专注 + 一轮休息
+        # 按钮文字在 finish_cycle 中途就换了，要等它最后记下这一轮才算走完，否则下一次点击会落在"计时中"
+        cycles = len(timer_drift.cycles)
+        txt_timer.value = f"00:{args.cycle_seconds:02d}"
+        click(btn_start, ui)
+        wait_for(lambda: len(timer_drift.cycles) > cycles, timeout=args.cycle_seconds + 5)
+
+
+def scenario_add_tasks(page, ui, args):
+    nav_to(page, ui, 1)
+    field = one(page, lambda c: isinstance(c, ft.TextField) and c.hint_text == "输入待办...", "待办输入框")
+    btn_add = one(page, lambda c: isinstance(c, ft.IconButton) and c.icon == "add_circle", "添加按钮")
+    conn = page.session.get("bench_conn")
+    samples, diffed = [], conn.snapshot()["diffed"]  # 切到待办页时整页构建的那次不算
+    for i in range(args.add_tasks):
+        field.value = f"基准任务 {i}"
+        t = time.perf_counter()
+        click(btn_add, ui)
+        samples.append((time.perf_counter() - t) * 1000)
+    p = percentiles(samples)
+    return {"add_ms": {k: round(v, 2) if k != "n" else v for k, v in p.items()},
+            "diffed_per_add": round((conn.snapshot()["diffed"] - diffed) / args.add_tasks, 1)}
+
+
+def scenario_tabs(page, ui, args):
+    for _ in range(args.tab_rounds):
+        for index in (1, 2, 0):
+            nav_to(page, ui, index)
+
+
+def scenario_reports(page, ui, args):
+    nav_to(page, ui, 2)
+    for text in ("📊 查看狩猎周报", "📅 毛线球日历", "📜 翻看日记本"):
+        btn = one(page, lambda c: isinstance(c, ft.ElevatedButton) and c.text == text, text)
+        for _ in range(2):
+            click(btn, ui)
+            ui.close_dialog([c for c in page.overlay if isinstance(c, ft.AlertDialog) and c.open][-1])
+            ui.wait_idle()
+
+
+SCENARIOS = {
+    "focus_cycle": scenario_focus_cycle,
+    "add_tasks": scenario_add_tasks,
+    "tabs": scenario_tabs,
+    "reports": scenario_reports,
+}
+
+
+def run_scenario(app, name, args):
+    page, conn = make_page(f"bench-{name}")
+    instrument_updates(page, conn)
+    page.session.set("bench_conn", conn)
+    app.main(page)
+    ui = page.session.get("ui_batcher")
+    wait_warm_up(page)
+    ui.wait_idle()
+    before = conn.snapshot()
+    t = time.perf_counter()
+    extra = SCENARIOS[name](page, ui, args)
+    ui.wait_idle()
+    wall_ms = (time.perf_counter() - t) * 1000
+    after = conn.snapshot()
+    close_page(page)
+    result = {k: after[k] - before[k] for k in after}
+    result["wall_ms"] = round(wall_ms, 1)
+    result.update(extra or {})
+    return result
+
+
+def compare(base, result, tolerance):
+    regressed = []
+    for name, now in result["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if old is None:
+            continue
+        for key in GATED:
+            limit = old[key] * (1 + tolerance)
+            if now[key] > limit and now[key] - old[key] > 2:
+                print(f"{name}.{key}: {old[key]} -> {now[key]} (上限 {limit:.0f})")
+                regressed.append(f"{name}.{key}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_args(parser)
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), help="只跑这几个场景")
+    parser.add_argument("--cycle-seconds", type=int, default=3, help="focus_cycle 里专注和休息各几秒")
+    parser.add_argument("--add-tasks", type=int, default=100)
+    parser.add_argument("--tab-rounds", type=int, default=5)
+    parser.add_argument("--save", help="把结果写成基线 JSON")
+    parser.add_argument("--baseline", help="和这个基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许比基线多的比例")
+    args = parser.parse_args()
+    for name in ("save", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    os.chdir(tempfile.mkdtemp(prefix="tomato-bench-"))
+    write_profile("station_data.json", **sizes_from_args(args))
+    import main as app
+    app.StudyLogic.fetch_weather = lambda self: f"{self.data.get('city', '')} 晴 20°C"
+
+    result = {"sizes": sizes_from_args(args), "scenarios": {}}
+    for name in args.only or SCENARIOS:
+        result["scenarios"][name] = run_scenario(app, name, args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        regressed = compare(base, result, args.tolerance)
+        if regressed:
+            print("退化: " + ", ".join(regressed))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
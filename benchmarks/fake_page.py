@@ -0,0 +1,156 @@
+"""进程内的假 Flet 会话：不连客户端，只记录发出去的命令，供基准测试驱动 main(page)。"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flet as ft
+from flet.core.connection import Connection
+from flet.core.protocol import CommandEncoder, PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+
+class FakeConnection(Connection):
+    """代替 WebSocket 连接：统计每次发送的命令数、序列化字节数，并给新控件分配 id"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.sends = 0  # 发送批次数(≈ page.update 次数)
+        self.commands = 0
+        self.controls = 0  # 命令里涉及的控件数(新增 + 改属性 + 移除)
+        self.bytes = 0
+        self.updates = 0  # page.update / control.update 调用次数，instrument_updates 之后才统计
+        self.diffed = 0  # 这些调用要对比的控件总数
+        self.first_add_at = None  # 第一次 add 命令的 perf_counter 时间戳
+
+    def _record(self, commands):
+        payload = json.dumps(commands, cls=CommandEncoder, ensure_ascii=False)
+        with self._lock:
+            self.sends += 1
+            self.commands += len(commands)
+            self.controls += sum(_touched(c) for c in commands)
+            self.bytes += len(payload.encode("utf-8"))
+            if self.first_add_at is None and any(c.name == "add" for c in commands):
+                self.first_add_at = time.perf_counter()
+
+    def _add_result(self, command):
+        with self._lock:
+            ids = []
+            for _ in command.commands:
+                self._next_id += 1
+                ids.append(f"_{self._next_id}")
+        return " ".join(ids)
+
+    def send_command(self, session_id, command):
+        self._record([command])
+        result = self._add_result(command) if command.name == "add" else ""
+        return PageCommandResponsePayload(result=result, error="")
+
+    def send_commands(self, session_id, commands):
+        self._record(commands)
+        # 和真实服务端一样，只有 add 命令返回新控件的 id
+        results = [self._add_result(c) for c in commands if c.name == "add"]
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def snapshot(self):
+        with self._lock:
+            return {"sends": self.sends, "commands": self.commands, "controls": self.controls, "bytes": self.bytes,
+                    "updates": self.updates, "diffed": self.diffed}
+
+    def count_update(self, diffed):
+        with self._lock:
+            self.updates += 1
+            self.diffed += diffed
+
+
+def _touched(command):
+    if command.name == "add":
+        return len(command.commands)
+    if command.name in ("remove", "clean"):
+        return len(command.values)
+    return 1
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    # 所有假会话共用一个后台事件循环，page.run_task 的协程在这里执行
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+
+def make_page(session_id="bench"):
+    conn = FakeConnection()
+    page = ft.Page(conn, session_id, _event_loop())
+    return page, conn
+
+
+def instrument_updates(page, conn):
+    """数 page.update 的调用(control.update 也走它)和每次要对比的控件数；
+    要遍历控件树，会拖慢被测代码，只在关心次数而不是耗时的基准里用"""
+    update = page.update
+
+    def counting_update(*controls):
+        # 整页刷新时从 page 走起，overlay 在 offstage 里也会走到
+        diffed = sum(1 for root in controls or [page] for _ in walk(root))
+        conn.count_update(diffed)
+        update(*controls)
+
+    page.update = counting_update
+
+
+def close_page(page):
+    """模拟客户端断开，让 main() 停掉自己的后台线程"""
+    if page.on_disconnect:
+        page.on_disconnect(None)
+
+
+def walk(control):
+    yield control
+    for child in control._get_children():
+        yield from walk(child)
+
+
+def find_controls(page, predicate):
+    roots = list(page.controls) + list(page.overlay)
+    return [c for root in roots for c in walk(root) if predicate(c)]
+
+
+def one(page, predicate, what):
+    found = find_controls(page, predicate)
+    if not found:
+        raise RuntimeError(f"找不到控件: {what}")
+    return found[0]
+
+
+class Event:
+    """给 on_click / on_change 用的假事件"""
+
+    def __init__(self, control=None, **kwargs):
+        self.control = control
+        self.__dict__.update(kwargs)
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            raise RuntimeError("等待超时")
+        time.sleep(0.02)
+
+
+def wait_warm_up(page, timeout=30):
+    """等会话的后台 warm_up 做完(完整数据已加载、音频已挂上)，它的刷新不混进后面的测量"""
+    trace = page.session.get("startup_trace")
+    wait_for(lambda: any(p[0] == "audio ready" for p in trace.phases), timeout)
@@ -0,0 +1,55 @@
+"""生成合成用户数据(station_data.json)，模拟用了好几年的重度用户。"""
+import json
+import random
+import uuid
+from datetime import date, timedelta
+
+PRIORITIES = ("red", "orange", "green")
+
+
+def make_profile(days=365, history=1000, tasks=100, countdowns=20, seed=42):
+    rnd = random.Random(seed)
+    today = date.today()
+    daily_stats = {}
+    for i in range(days):
+        if rnd.random() < 0.8:
+            daily_stats[(today - timedelta(days=i)).strftime("%Y-%m-%d")] = rnd.randint(1, 12)
+    return {
+        "target_name": "上岸",
+        "target_date": (today + timedelta(days=200)).strftime("%Y-%m-%d"),
+        "city": "郑州",
+        "focus_min": 25,
+        "break_min": 5,
+        "tomatoes": rnd.randint(0, 8),
+        "tomatoes_date": today.strftime("%Y-%m-%d"),
+        "tasks": [{"id": uuid.UUID(int=rnd.getrandbits(128)).hex[:12], "text": f"复习第{i}章 习题",
+                   "priority": rnd.choice(PRIORITIES),
+                   "created": (today - timedelta(days=rnd.randint(0, days))).strftime("%Y-%m-%d")}
+                  for i in range(tasks)],
+        "daily_stats": daily_stats,
+        "countdowns": [{"id": uuid.UUID(int=rnd.getrandbits(128)).hex[:12], "title": f"考试 {i}",
+                        "date": (today + timedelta(days=rnd.randint(-60, 400))).strftime("%Y-%m-%d")}
+                       for i in range(countdowns)],
+        "history": [f"[{rnd.randint(0, 23):02}:{rnd.randint(0, 59):02}] "
+                    + rnd.choice(["捕获一只番茄 🍅 (嚼嚼嚼)", "🐾 按下今日爪印", f"爪子一挥，完成: 复习第{i}章 习题",
+                                  f"🗑️ 埋掉旧目标: 考试 {i}"])
+                    for i in range(history)],
+        "last_checkin": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
+        "streak_days": rnd.randint(0, 100),
+    }
+
+
+def write_profile(path, **sizes):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_profile(**sizes), f, ensure_ascii=False, indent=2)
+
+
+def add_size_args(parser):
+    parser.add_argument("--days", type=int, default=365, help="daily_stats 覆盖的天数")
+    parser.add_argument("--history", type=int, default=1000, help="历史记录条数")
+    parser.add_argument("--tasks", type=int, default=100, help="待办任务数")
+    parser.add_argument("--countdowns", type=int, default=20, help="倒计时数")
+
+
+def sizes_from_args(args):
+    return {"days": args.days, "history": args.history, "tasks": args.tasks, "countdowns": args.countdowns}
@@ -0,0 +1,652 @@
+"""猫猫专注助手的运行诊断工具：启动耗时追踪、运行指标、计时精度、性能档案、处理函数追踪。只依赖标准库，main.py 最先导入它。"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# 设置 TOMATO_STARTUP_TRACE=1 时，首帧之后把启动追踪打印出来并写到 startup_trace.json。
+# 手机上不方便设环境变量，在工作目录放一个 startup_trace.on 文件也能打开
+STARTUP_TRACE_ENABLED = (os.environ.get("TOMATO_STARTUP_TRACE", "") not in ("", "0")
+                         or os.path.exists("startup_trace.on"))
+
+
+class StartupTrace:
+    """按发生顺序记录启动各阶段的起点和耗时(毫秒，相对 t0)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.t0 = time.perf_counter()
+        self.phases = []  # [(阶段名, 起点ms, 耗时ms)]，耗时为 None 表示只是个时间点
+
+    def _now_ms(self):
+        return (time.perf_counter() - self.t0) * 1000
+
+    @contextmanager
+    def phase(self, name):
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start, self._now_ms() - start))
+
+    def mark(self, name):
+        self.phases.append((name, self._now_ms(), None))
+
+    def elapsed_ms(self):
+        return self._now_ms()
+
+    def report(self):
+        return {
+            "name": self.name,
+            "phases": [{"phase": n, "at_ms": round(at, 3), "ms": None if d is None else round(d, 3)}
+                       for n, at, d in self.phases],
+        }
+
+    def format(self):
+        lines = [f"[{self.name}]"]
+        for n, at, d in self.phases:
+            dur = "" if d is None else f"{d:9.2f} ms"
+            lines.append(f"  {at:9.2f} ms  {dur:>12}  {n}")
+        return "\n".join(lines)
+
+
+# 模块导入阶段的追踪，在 main.py 顶部最先创建
+import_trace = StartupTrace("import")
+
+
+def dump_startup_trace(session_trace, path="startup_trace.json"):
+    """首帧之后调用：打印并落盘本次启动的导入追踪和会话追踪"""
+    if not STARTUP_TRACE_ENABLED:
+        return
+    print(import_trace.format())
+    print(session_trace.format())
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([import_trace.report(), session_trace.report()], f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+
+# ==========================================
+# 运行指标：计数器 / 仪表 / 直方图，按 Prometheus 文本格式导出
+# ==========================================
+# 设置 TOMATO_METRICS_PORT=9464 会在 127.0.0.1 上开一个 /metrics；
+# 设置 TOMATO_METRICS_SNAPSHOT=60 会每 60 秒把全部指标写到 metrics_snapshot.json
+METRICS_PORT = int(os.environ.get("TOMATO_METRICS_PORT", "0") or 0)
+METRICS_SNAPSHOT_SEC = float(os.environ.get("TOMATO_METRICS_SNAPSHOT", "0") or 0)
+
+# 默认桶(秒)：覆盖一次刷新的几毫秒到一次联网的十几秒
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for k, v in pairs)
+    return "{" + body + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}  # 标签 -> 值
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self):
+        return {_format_labels(key) or "": value for _, key, value in self.samples()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn=None):
+        super().__init__(name, help_text)
+        self.fn = fn  # 有 fn 的仪表在导出时现算(比如线程数)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.fn is not None:
+            return [(self.name, (), self.fn())]
+        return super().samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]  # [各桶计数, 总数, 总和]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self._values.items()]
+        for key, counts, total, acc in items:
+            running = 0
+            for bound, c in zip(self.buckets, counts):
+                running += c
+                out.append((self.name + "_bucket", key + (("le", repr(float(bound))),), running))
+            out.append((self.name + "_bucket", key + (("le", "+Inf"),), total))
+            out.append((self.name + "_count", key, total))
+            out.append((self.name + "_sum", key, acc))
+        return out
+
+    def snapshot(self):
+        return {_format_labels(_label_key(labels)) or "": entry for labels, entry in self.series()}
+
+    def series(self):
+        """[(标签 dict, {count, sum, quantiles}), ...]，按标签分组统计时用"""
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self._values.items()]
+        return [(dict(key), {"count": total, "sum": round(acc, 6), "quantiles": self._quantiles(counts, total)})
+                for key, counts, total, acc in items]
+
+    def _quantiles(self, counts, total):
+        """按桶估算 p50/p90/p99(取所在桶的上界)"""
+        result = {}
+        for q in (0.5, 0.9, 0.99):
+            target, running = q * total, 0
+            bound = None
+            for b, c in zip(self.buckets, counts):
+                running += c
+                if running >= target and total:
+                    bound = b
+                    break
+            result[f"p{int(q * 100)}"] = bound if total else None
+        return result
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}  # 名字 -> 指标，按注册顺序导出
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text="", fn=None):
+        return self._get(Gauge, name, help_text, fn=fn)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        """Prometheus 文本格式(0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, key, value in m.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics}
+
+
+metrics = MetricsRegistry()
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    routes = {}  # 路径 -> (content-type, 生成响应文本的函数)
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        route = self.routes.get(path)
+        if route is None:
+            self.send_error(404)
+            return
+        content_type, fn = route
+        try:
+            body = fn(parse_qs(query)).encode("utf-8")
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 不往控制台刷访问日志
+
+
+def add_metrics_route(path, fn, content_type="application/json; charset=utf-8"):
+    """给指标端口加一个只读页面；fn(查询参数 dict) -> 文本"""
+    _MetricsHandler.routes[path] = (content_type, fn)
+
+
+add_metrics_route("/metrics", lambda query: metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+add_metrics_route("/snapshot", lambda query: json.dumps(metrics.snapshot(), ensure_ascii=False, indent=2))
+
+
+def write_metrics_snapshot(path="metrics_snapshot.json"):
+    try:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "metrics": metrics.snapshot()}, f,
+                      ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def start_metrics_exporters(port=None, snapshot_sec=None):
+    """按环境变量打开 HTTP 端点和定时快照；进程里只开一次，返回实际监听的端口(没开为 None)"""
+    global _exporters_started
+    port = METRICS_PORT if port is None else port
+    snapshot_sec = METRICS_SNAPSHOT_SEC if snapshot_sec is None else snapshot_sec
+    with _exporters_lock:
+        if _exporters_started:
+            return None
+        _exporters_started = True
+    bound = None
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            server.daemon_threads = True
+            bound = server.server_address[1]
+            threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+        except OSError as e:
+            print(f"指标端口 {port} 开不了: {e}")
+    if snapshot_sec > 0:
+        def loop():
+            while True:
+                time.sleep(snapshot_sec)
+                write_metrics_snapshot()
+        threading.Thread(target=loop, daemon=True, name="metrics-snapshot").start()
+    return bound
+
+
+# ==========================================
+# 计时精度：每一轮专注/休息从“该结束”到“界面真的变了”各段的延迟
+# ==========================================
+M_TIMER_END_DELAY = metrics.histogram("tomato_timer_end_delay_seconds",
+                                      "一轮计时从预定结束到各阶段完成的延迟(秒)，按阶段",
+                                      buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+
+def percentiles(samples, qs=(0.5, 0.9, 0.99)):
+    """简单的最近秩分位数；samples 为空返回 None"""
+    if not samples:
+        return None
+    s = sorted(samples)
+    out = {f"p{int(q * 100)}": s[min(len(s) - 1, int(len(s) * q))] for q in qs}
+    out["max"] = s[-1]
+    out["n"] = len(s)
+    return out
+
+
+class TimerDriftMonitor:
+    """记录最近若干轮计时：
+    detect = 计时线程发现到点 - 预定结束；hop = finish_cycle 真正开始 - 发现到点(run_task 的排队)；
+    ui = 结束后的界面刷新发完 - finish_cycle 开始；total = 界面刷新发完 - 预定结束"""
+
+    STAGES = ("detect", "hop", "ui", "total")
+
+    def __init__(self, keep=200):
+        self._lock = threading.Lock()
+        self.cycles = deque(maxlen=keep)
+
+    def record(self, mode, planned_end, detected_at, started_at, ui_done_at):
+        cycle = {
+            "mode": mode,
+            "planned_end": planned_end,
+            "detect": detected_at - planned_end,
+            "hop": started_at - detected_at,
+            "ui": ui_done_at - started_at,
+            "total": ui_done_at - planned_end,
+        }
+        with self._lock:
+            self.cycles.append(cycle)
+        for stage in self.STAGES:
+            M_TIMER_END_DELAY.observe(max(0.0, cycle[stage]), stage=stage)
+
+    def summary(self):
+        """各阶段延迟的分位数(毫秒)"""
+        with self._lock:
+            cycles = list(self.cycles)
+        result = {"cycles": len(cycles)}
+        for stage in self.STAGES:
+            p = percentiles([c[stage] * 1000 for c in cycles])
+            result[stage] = p and {k: (round(v, 2) if k != "n" else v) for k, v in p.items()}
+        return result
+
+
+timer_drift = TimerDriftMonitor()
+add_metrics_route("/timer", lambda query: json.dumps(timer_drift.summary(), ensure_ascii=False, indent=2))
+
+
+# ==========================================
+# 性能档案：按需给事件处理函数套 cProfile，定时拍 tracemalloc 快照
+# ==========================================
+# TOMATO_PROFILE=1 启动时就打开；也可以在“猫猫体检”里临时打开。
+# TOMATO_PROFILE_SAMPLE=N 表示每个处理函数每 N 次调用剖析一次
+PROFILE_DIR = os.environ.get("TOMATO_PROFILE_DIR", "profile_reports")
+
+
+class HandlerProfiler:
+    """关着的时候被包装的函数只多一次属性判断；打开后按采样率剖析，
+    每隔 interval 秒把各处理函数的热点和内存增长写成一份报告，只留最近 keep 份"""
+
+    def __init__(self, report_dir=PROFILE_DIR, interval=60, keep=10, sample_every=1):
+        self.enabled = False
+        self.report_dir = report_dir
+        self.interval = interval
+        self.keep = keep
+        self.sample_every = max(1, sample_every)
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()  # 同一时刻只剖析一个调用，嵌套调用也只剖析最外层
+        self._stats = {}  # 处理函数名 -> pstats.Stats
+        self._calls = {}  # 处理函数名 -> 调用次数(采样用)
+        self._last_snapshot = None
+        self._generation = 0  # 每次打开换一代，旧的报告线程自己退出
+
+    def enable(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self.enabled = True
+            self._generation += 1
+            generation = self._generation
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self._last_snapshot = tracemalloc.take_snapshot()
+        threading.Thread(target=self._report_loop, args=(generation,), daemon=True, name="profiler").start()
+
+    def disable(self):
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._generation += 1
+        self.write_report()
+        tracemalloc.stop()
+        self._last_snapshot = None
+
+    def wrap(self, name, fn):
+        def wrapped(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            with self._lock:
+                n = self._calls[name] = self._calls.get(name, 0) + 1
+            if n % self.sample_every:
+                return fn(*args, **kwargs)
+            # Python 3.12 起整个解释器同时只能开一个 cProfile：别的处理函数(或外层嵌套调用)正在剖析时，
+            # 这一次就不剖析，照常执行
+            if not self._busy.acquire(blocking=False):
+                return fn(*args, **kwargs)
+            ran = False
+
+            def target():
+                nonlocal ran
+                ran = True
+                return fn(*args, **kwargs)
+
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(target)
+            except Exception:
+                if ran:
+                    raise
+                return fn(*args, **kwargs)  # 剖析器没开起来(比如外面还挂着别的剖析工具)
+            finally:
+                self._busy.release()
+                if ran:
+                    with self._lock:
+                        stats = self._stats.get(name)
+                        if stats is None:
+                            self._stats[name] = pstats.Stats(profile)
+                        else:
+                            stats.add(profile)
+        return wrapped
+
+    def _report_loop(self, generation):
+        while True:
+            time.sleep(self.interval)
+            if generation != self._generation:
+                return
+            self.write_report()
+
+    def write_report(self):
+        """把攒下的剖析结果和内存增长写一份报告并清空；返回文件路径(没东西可写时 None)"""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            calls = dict(self._calls)
+        lines = [f"# {time.strftime('%Y-%m-%d %H:%M:%S')}  各处理函数累计调用: {calls}"]
+        for name, st in sorted(stats.items()):
+            buf = io.StringIO()
+            st.stream = buf
+            st.sort_stats("cumulative").print_stats(25)
+            lines += ["", f"## {name}", buf.getvalue()]
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines += ["", f"## 内存  当前 {current / 1024:.0f} KB，峰值 {peak / 1024:.0f} KB，比上一份多出来的前 20 处"]
+            if self._last_snapshot is not None:
+                lines += [str(diff) for diff in snapshot.compare_to(self._last_snapshot, "lineno")[:20]]
+            self._last_snapshot = snapshot
+        if not stats and len(lines) <= 1:
+            return None
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            path = os.path.join(self.report_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            self._rotate()
+            return path
+        except OSError:
+            return None
+
+    def _rotate(self):
+        reports = sorted(n for n in os.listdir(self.report_dir) if n.startswith("profile-"))
+        for name in reports[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.report_dir, name))
+            except OSError:
+                pass
+
+
+profiler = HandlerProfiler(sample_every=int(os.environ.get("TOMATO_PROFILE_SAMPLE", "1") or 1))
+if os.environ.get("TOMATO_PROFILE", "") not in ("", "0"):
+    profiler.enable()
+
+
+# ==========================================
+# 处理函数追踪：每个按钮的耗时分布、其中存盘和刷界面各占多少、慢操作记录
+# ==========================================
+# 超过这个毫秒数的一次调用记进慢操作日志(/handlers 里能看到，也会打到 stderr)
+SLOW_HANDLER_MS = float(os.environ.get("TOMATO_SLOW_HANDLER_MS", "200") or 200)
+DATA_SIZE_BUCKETS = ((100, "<100"), (1000, "<1k"), (10000, "<10k"))  # 按记录总数分档，标签不会无限多
+
+M_HANDLER_SECONDS = metrics.histogram("tomato_handler_seconds", "界面事件处理函数耗时(秒)，按处理函数和数据量分档")
+M_HANDLER_PART_SECONDS = metrics.histogram("tomato_handler_part_seconds",
+                                           "处理函数里存盘(storage)和同步刷界面(ui)花的时间(秒)")
+M_HANDLER_ERRORS = metrics.counter("tomato_handler_errors_total", "处理函数抛出的异常")
+
+
+def data_size_bucket(sizes):
+    total = sum(sizes.values())
+    for bound, label in DATA_SIZE_BUCKETS:
+        if total < bound:
+            return label
+    return ">=10k"
+
+
+class HandlerTracer:
+    """记录每次处理函数调用的耗时；存盘、刷界面的地方用 span() 把时间记到当前正在跑的处理函数上。
+    后台刷新线程里发生的刷新不属于任何处理函数，只算进 tomato_page_update_seconds"""
+
+    def __init__(self, slow_ms=SLOW_HANDLER_MS, keep=100):
+        self.slow_ms = slow_ms
+        self.slow = deque(maxlen=keep)
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, part):
+        record = getattr(self._local, "record", None)
+        if record is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record[part] += time.perf_counter() - start
+
+    def call(self, name, fn, args, kwargs, sizes=None):
+        parent = getattr(self._local, "record", None)
+        record = self._local.record = {"storage": 0.0, "ui": 0.0}
+        error = None
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            error = type(e).__name__
+            M_HANDLER_ERRORS.inc(handler=name, error=error)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.record = parent
+            if parent is not None:  # 嵌套调用的存盘/刷界面也算在外层头上
+                parent["storage"] += record["storage"]
+                parent["ui"] += record["ui"]
+            self._finish(name, elapsed, record, error, sizes)
+
+    def _finish(self, name, elapsed, record, error, sizes):
+        try:
+            counts = sizes() if sizes else {}
+        except Exception:
+            counts = {}
+        bucket = data_size_bucket(counts) if counts else "unknown"
+        M_HANDLER_SECONDS.observe(elapsed, handler=name, data=bucket)
+        for part in ("storage", "ui"):
+            if record[part]:
+                M_HANDLER_PART_SECONDS.observe(record[part], handler=name, part=part)
+        if elapsed * 1000 >= self.slow_ms:
+            entry = {"at": time.strftime("%Y-%m-%d %H:%M:%S"), "handler": name, "ms": round(elapsed * 1000, 1),
+                     "storage_ms": round(record["storage"] * 1000, 1), "ui_ms": round(record["ui"] * 1000, 1),
+                     "sizes": counts}
+            if error:
+                entry["error"] = error
+            self.slow.append(entry)
+            print(f"[慢操作] {name} {entry['ms']}ms (存盘 {entry['storage_ms']}ms, 界面 {entry['ui_ms']}ms) "
+                  f"数据量 {counts}", file=sys.stderr)
+
+    def summary(self, handler=None):
+        """各处理函数的调用次数、分位数(来自直方图的桶，偏保守)、平均存盘/界面耗时，以及最近的慢操作"""
+        out, sums = {}, {}
+        for labels, h in sorted(M_HANDLER_SECONDS.series(), key=lambda item: item[0]["handler"]):
+            if handler and labels["handler"] != handler:
+                continue
+            entry = out.setdefault(labels["handler"], {"count": 0, "avg_ms": 0.0, "by_data_size": {}})
+            sums[labels["handler"]] = sums.get(labels["handler"], 0.0) + h["sum"] * 1000
+            entry["count"] += h["count"]
+            entry["by_data_size"][labels["data"]] = {"count": h["count"],
+                                                     "avg_ms": round(h["sum"] * 1000 / h["count"], 2),
+                                                     "quantiles_s": h["quantiles"]}
+        for labels, h in M_HANDLER_PART_SECONDS.series():
+            if labels["handler"] in out:
+                out[labels["handler"]][labels["part"] + "_ms_total"] = round(h["sum"] * 1000, 2)
+        for name, entry in out.items():
+            entry["avg_ms"] = round(sums[name] / entry["count"], 2)
+        slow = [e for e in self.slow if not handler or e["handler"] == handler]
+        return {"slow_ms": self.slow_ms, "handlers": out, "slow": slow}
+
+
+tracer = HandlerTracer()
+add_metrics_route("/handlers", lambda query: json.dumps(tracer.summary(query.get("handler", [None])[0]),
+                                                        ensure_ascii=False, indent=2))
+
+
+def instrumented(fn=None, *, sizes=None):
+    """给界面事件处理函数用的装饰器：每次调用都进 HandlerTracer，打开性能档案时再套 cProfile。
+    sizes 是返回 {"tasks": n, ...} 的函数，用来给耗时按数据量分档"""
+    if fn is None:
+        return lambda f: instrumented(f, sizes=sizes)
+    name = fn.__name__
+    profiled = profiler.wrap(name, fn)
+
+    def wrapped(*args, **kwargs):
+        return tracer.call(name, profiled, args, kwargs, sizes)
+    wrapped.__name__ = name
+    wrapped.__wrapped__ = fn
+    return wrapped
@@ -1,21 +1,343 @@
-import flet as ft
-import flet_audio
+from diagnostics import (StartupTrace, import_trace, dump_startup_trace, instrumented, metrics, profiler,
+                         start_metrics_exporters, timer_drift, tracer)
+
+with import_trace.phase("import flet"):
+    import flet as ft
+import base64
+import hashlib
+import importlib
 import json
+import math
 import os
 import time
 import random
-import requests
+import re
+import shutil
+import sys
 import threading
-from datetime import datetime, timedelta
-from plyer import vibrator, notification
+import tomllib
+import itertools
+import bisect
+import collections
+import uuid
+from array import array
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import date, datetime, timedelta
+
+# 可选依赖(requests / plyer / flet_audio)不在启动时导入：
+# 首帧之后由后台线程预热，用到时再取；缺了就降级，不影响主流程
+_optional_modules = {}
+
+
+def optional_import(name):
+    """按需导入并缓存；导入失败返回 None"""
+    if name not in _optional_modules:
+        try:
+            with import_trace.phase(f"import {name}"):
+                _optional_modules[name] = importlib.import_module(name)
+        except Exception:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+def warm_up_optional_imports():
+    for name in ("flet_audio", "requests", "plyer", "numpy"):
+        optional_import(name)
+
+
+# 运行指标，见 diagnostics.metrics；TOMATO_METRICS_PORT / TOMATO_METRICS_SNAPSHOT 打开导出
+M_SAVE_SECONDS = metrics.histogram("tomato_save_seconds", "save_data 写盘耗时(秒)")
+M_SAVE_FAILURES = metrics.counter("tomato_save_failures_total", "save_data 写盘失败次数，按异常类型")
+M_WEATHER_SECONDS = metrics.histogram("tomato_weather_fetch_seconds", "拉一次天气的耗时(秒)")
+M_WEATHER_TOTAL = metrics.counter("tomato_weather_fetch_total", "拉天气次数，按结果")
+M_TIMER_JITTER = metrics.histogram("tomato_timer_tick_jitter_seconds", "计时线程每次醒来比预定晚了多久(秒)",
+                                   buckets=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1))
+M_UPDATE_REQUESTS = metrics.counter("tomato_ui_update_requests_total", "请求刷新的次数(合并前)")
+M_PAGE_UPDATES = metrics.counter("tomato_page_updates_total", "实际发出的 page.update 次数，按整页/局部")
+M_PAGE_UPDATE_ERRORS = metrics.counter("tomato_page_update_errors_total", "page.update 抛异常的次数，按异常类型")
+M_PAGE_UPDATE_SECONDS = metrics.histogram("tomato_page_update_seconds", "一次 page.update 的耗时(秒)")
+M_SESSIONS = metrics.gauge("tomato_active_sessions", "当前连着的会话数")
+M_THREADS = metrics.gauge("tomato_threads", "进程里的线程数", fn=threading.active_count)
+
+# 任务紧急程度，从急到缓
+PRIORITY_ORDER = ("red", "orange", "green")
+
+# 历史检索的倒排索引只收单个字(汉字、emoji)：查询里的字在条目里出现，等价于这个字在条目的词表里。
+# 英文/数字不进索引：用户常只输半个词("12" 要搜到 "第112章"，"12:3" 要搜到 "12:34")，按整词查会漏
+_INDEX_CHAR_RE = re.compile(r"[^\sa-z0-9\[\]:：,，()（）.。!！?？\-]")
+
+
+def tokenize(text):
+    return set(_INDEX_CHAR_RE.findall(text.lower()))
+
+
+class DayClock:
+    """缓存"今天"，过零点时通知订阅者换日；所有会话共用一个。
+    热路径读 today_str 等属性只比较一次时间戳，不再格式化日期"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._thread = None
+        self._set_day(date.today())
+
+    def _set_day(self, day):
+        self._today = day
+        self._today_str = day.strftime("%Y-%m-%d")
+        self._yesterday_str = (day - timedelta(days=1)).strftime("%Y-%m-%d")
+        self._today_ordinal = day.toordinal()
+        self._next_midnight = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+
+    @property
+    def today(self):
+        self._check()
+        return self._today
+
+    @property
+    def today_str(self):
+        self._check()
+        return self._today_str
+
+    @property
+    def yesterday_str(self):
+        self._check()
+        return self._yesterday_str
+
+    @property
+    def today_ordinal(self):
+        self._check()
+        return self._today_ordinal
+
+    def subscribe(self, listener):
+        """listener(today_str) 在换日后调用(在时钟线程里)"""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _check(self):
+        # 计时线程醒晚了(休眠、挂起)也不会读到昨天
+        if time.time() >= self._next_midnight:
+            self._roll()
+
+    def _roll(self):
+        with self._lock:
+            if time.time() < self._next_midnight:
+                return  # 别的线程刚换过日，不能再把下一次零点改成一秒后
+            day = date.today()
+            if day == self._today:
+                # 系统时间还没真正跨过零点(时钟误差)，稍后再看
+                self._next_midnight = time.time() + 1
+                return
+            self._set_day(day)
+            listeners = list(self._listeners)
+            today_str = self._today_str
+        for listener in listeners:
+            try:
+                listener(today_str)
+            except Exception:
+                pass
+
+    def _run(self):
+        while True:
+            time.sleep(max(0.5, self._next_midnight - time.time()))
+            self._check()
+
+
+day_clock = DayClock()
+
+
+@lru_cache(maxsize=4096)
+def date_ordinal(date_str):
+    """'YYYY-MM-DD' -> 公历序数；同一个日期串只解析一次，写错了返回 None"""
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+HEAT_LEVELS = 4  # 热力图颜色档数(不含 0)
+
+
+def _month_starts(start, end):
+    """start..end 之间每个月 1 号相对 start 的偏移(第一个总是 0)，以及对应的 'YYYY-MM' 标签"""
+    offsets, labels = [], []
+    y, m = start.year, start.month
+    while True:
+        first = date(y, m, 1)
+        if first > end:
+            break
+        offsets.append(max(0, (first - start).days))
+        labels.append(f"{y}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return offsets, labels
+
+
+def _segment_sums(series, offsets, np):
+    if np is not None:
+        return [int(x) for x in np.add.reduceat(series, offsets)]
+    bounds = offsets[1:] + [len(series)]
+    return [sum(series[a:b]) for a, b in zip(offsets, bounds)]
+
+
+def aggregate_focus(daily_stats, today_ordinal):
+    """把 {日期串: 番茄数} 摊成从第一天到今天的稠密日序列，再整段做按月/按年求和和热力图分档。
+    装了 NumPy 就用它，没有就用 array 顶上。"""
+    np = optional_import("numpy")
+    if np is not None:
+        try:
+            keys = np.array(list(daily_stats), dtype="datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+            counts = np.fromiter(daily_stats.values(), dtype=np.int64, count=len(daily_stats))
+        except (ValueError, TypeError):
+            np = None  # 有写坏的日期，交给下面逐个容错解析
+    if np is None:
+        pairs = [(date_ordinal(k), v) for k, v in daily_stats.items()]
+        pairs = [(o, v) for o, v in pairs if o is not None]
+        keys = array("l", (o for o, _ in pairs))
+        counts = array("l", (v for _, v in pairs))
+
+    start_ord = min(min(keys, default=today_ordinal), today_ordinal)
+    n = today_ordinal - start_ord + 1
+    if np is not None:
+        series = np.zeros(n, dtype=np.int64)
+        keep = keys <= today_ordinal
+        np.add.at(series, keys[keep] - start_ord, counts[keep])
+    else:
+        series = array("l", bytes(n * array("l").itemsize))
+        for o, c in zip(keys, counts):
+            if o <= today_ordinal:
+                series[o - start_ord] += c
+
+    start, end = date.fromordinal(start_ord), date.fromordinal(today_ordinal)
+    m_offsets, m_labels = _month_starts(start, end)
+    month_totals = _segment_sums(series, m_offsets, np)
+    y_offsets = [o for o, label in zip(m_offsets, m_labels) if label.endswith("-01") or o == 0]
+    y_labels = [int(label[:4]) for o, label in zip(m_offsets, m_labels) if label.endswith("-01") or o == 0]
+    year_totals = _segment_sums(series, y_offsets, np)
+
+    # 热力图按周排成列，周一在最上面；第一天之前和今天之后的格子记 -1
+    pad = start.weekday()
+    cells = -(-(pad + n) // 7) * 7
+    peak = int(max(series)) if np is None else int(series.max())
+    scale = HEAT_LEVELS / peak if peak else 0
+    if np is not None:
+        levels = np.full(cells, -1, dtype=np.int64)
+        levels[pad:pad + n] = np.ceil(series * scale)
+        levels = levels.tolist()
+        total, active = int(series.sum()), int(np.count_nonzero(series))
+        series = series.tolist()
+    else:
+        levels = [-1] * pad + [-(-c * HEAT_LEVELS // peak) if peak else 0 for c in series]
+        levels += [-1] * (cells - len(levels))
+        total, active = sum(series), n - series.count(0)
+        series = series.tolist()
+    return {
+        "start": start, "days": n, "pad": pad, "total": total, "active_days": active, "peak": peak,
+        "series": series,
+        "weeks": [levels[i:i + 7] for i in range(0, cells, 7)],
+        "months": list(zip(m_labels, month_totals)),
+        "years": list(zip(y_labels, year_totals)),
+    }
 
 
 # ==========================================
 # 1. 逻辑层 (完全保留你的原有逻辑)
 # ==========================================
+QUOTES = (
+    "既然上了贼船\n就做个快乐的海盗猫",
+    "与其仰望星空\n不如去抓那只蝴蝶",
+    "哪怕是流浪猫\n也有看夕阳的权利",
+    "保持好奇心\n是猫咪长寿的秘诀",
+    "没有什么烦恼\n是一个罐头解决不了的",
+    "只要步履不停\n小鱼干终将抵达",
+    "现在的努力\n是为了以后能躺平晒太阳",
+)
+
+
+# 任务、倒计时在内存里用 __slots__ 记录：不再每条带一个 dict、重复存键名；读写 station_data.json 时
+# 才和原来的 JSON 形状互转，文件格式不变。
+# 取值种类少的字段(优先级、日期)和历史条目驻留(sys.intern)：同一会话里重复的只存一份，多个会话加载
+# 同一份数据时也共用。历史条目本身就是字符串，"[HH:MM] 捕获一只番茄" 这类每天重复，驻留后比拆成记录更省，
+# 搜索、翻页也照旧直接用字符串；任务名、id 基本各不相同，驻留只会让驻留表变大，就不做
+_PRIORITIES = {p: p for p in PRIORITY_ORDER}  # 映射到这三个常量对象，全部任务共用
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Task:
+    __slots__ = ("id", "text", "priority", "created", "extra")
+    FIELDS = frozenset(("id", "text", "priority", "created"))
+
+    def __init__(self, id, text, priority="green", created="", extra=None):
+        self.id = id
+        self.text = text
+        self.priority = _PRIORITIES.get(priority, "green")
+        self.created = _intern(created)
+        self.extra = extra  # 不认识的字段原样留着，存盘时写回去
+
+    @classmethod
+    def from_json(cls, obj):
+        # 老数据里的任务可能是纯字符串
+        if type(obj) is not dict:
+            return cls("", str(obj))
+        extra = None if cls.FIELDS.issuperset(obj) else {k: v for k, v in obj.items() if k not in cls.FIELDS}
+        get = obj.get
+        return cls(get("id") or "", get("text", ""), get("priority"), get("created", ""), extra)
+
+    def to_json(self):
+        obj = {"id": self.id, "text": self.text, "priority": self.priority, "created": self.created}
+        if self.extra:
+            obj.update(self.extra)
+        return obj
+
+    def __repr__(self):
+        return f"Task({self.id!r}, {self.text!r}, {self.priority!r})"
+
+
+class Countdown:
+    __slots__ = ("id", "title", "date", "extra")
+    FIELDS = frozenset(("id", "title", "date"))
+
+    def __init__(self, id, title, date, extra=None):
+        self.id = id
+        self.title = title
+        self.date = _intern(date)
+        self.extra = extra
+
+    @classmethod
+    def from_json(cls, obj):
+        extra = None if cls.FIELDS.issuperset(obj) else {k: v for k, v in obj.items() if k not in cls.FIELDS}
+        get = obj.get
+        return cls(get("id") or "", get("title", ""), get("date", ""), extra)
+
+    def to_json(self):
+        obj = {"id": self.id, "title": self.title, "date": self.date}
+        if self.extra:
+            obj.update(self.extra)
+        return obj
+
+    def __repr__(self):
+        return f"Countdown({self.id!r}, {self.title!r}, {self.date!r})"
+
+
 class StudyLogic:
-    def __init__(self):
+    # 首页首帧需要的字段，额外存一份到小快照文件里，启动时先读它
+    SNAPSHOT_KEYS = ("target_name", "target_date", "city", "focus_min", "break_min",
+                     "tomatoes", "tomatoes_date", "last_checkin", "streak_days")
+
+    def __init__(self, defer_load=False):
         self.data_file = 'station_data.json'
+        self.snapshot_file = 'home_snapshot.json'
         self.data = {
             "target_name": "上岸",
             "target_date": "2026-12-21",
@@ -28,9 +350,65 @@ class StudyLogic:
             "countdowns": [],
             "history": [],
             "last_checkin": "",
-            "streak_days": 0
+            "streak_days": 0,
+            "tomatoes_date": ""
         }
-        self.load_data()
+        # 任务索引：id -> 任务；dict 保持插入顺序，同时充当展示顺序
+        self.task_index = {}
+        # 按紧急程度分桶：priority -> {id: 任务}，桶内同样按添加顺序
+        self.task_buckets = {p: {} for p in PRIORITY_ORDER}
+        # 倒计时索引：id -> 事件，外加按日期排好序的 [(序数, id)]
+        self.countdown_index = {}
+        self.countdown_order = []
+        self._countdown_ordinals = {}
+        self._next_countdown_day = None  # 缓存"下一个截止日"是按哪天算的
+        self._next_countdown = None
+        self.weather = ""  # 最近一次的天气，只存在快照里
+        self._history_index = None  # 历史倒排索引：词 -> [条目下标(升序)]，第一次搜索时才建
+        self._focus_model = None  # (今天序数, aggregate_focus 结果)，下一只番茄之前一直复用
+        # 完整数据加载完成；快照阶段的数据不全，所有改数据的方法都先等它
+        self.loaded = threading.Event()
+        self._snapshot = None  # 最近一次写出(或读到)的首页快照
+        # defer_load: 有快照就只读快照，完整数据由调用方稍后在后台 load_data()
+        if not (defer_load and self.load_home_snapshot()):
+            self.load_data()
+
+    def load_home_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.data.update({k: snapshot[k] for k in self.SNAPSHOT_KEYS if k in snapshot})
+        self.weather = snapshot.get("weather", "")
+        self._snapshot = snapshot
+        self.roll_daily_counters()
+        return True
+
+    def home_snapshot(self):
+        snapshot = {k: self.data.get(k) for k in self.SNAPSHOT_KEYS}
+        snapshot["weather"] = self.weather
+        snapshot["task_count"] = self.task_count()
+        snapshot["urgent"] = [t.text for t in self.top_urgent_tasks(3)]
+        return snapshot
+
+    def write_home_snapshot(self):
+        """首页相关的值变了才写；快照很小，写一次几乎没有成本"""
+        if not self.loaded.is_set():
+            return
+        snapshot = self.home_snapshot()
+        if snapshot == self._snapshot:
+            return
+        try:
+            with open(self.snapshot_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            self._snapshot = snapshot
+        except OSError:
+            pass
+
+    def set_weather(self, weather):
+        self.weather = weather
+        self.write_home_snapshot()
 
     def load_data(self):
         if os.path.exists(self.data_file):
@@ -42,26 +420,98 @@ class StudyLogic:
                         self.data["daily_stats"] = {}
             except:
                 pass
+        self._build_task_index()
+        self._build_countdown_index()
+        self.data["history"] = [sys.intern(e if type(e) is str else str(e)) for e in self.data.get("history", [])]
+        self._history_index = None
+        self._focus_model = None
+        if not self.data.get("tomatoes_date"):
+            self.data["tomatoes_date"] = day_clock.today_str
+        self.roll_daily_counters()
+        self.loaded.set()
+        self.write_home_snapshot()
+
+    def roll_daily_counters(self):
+        """换日了就把"今日渔获"清零；返回是否真的清了"""
+        today = day_clock.today_str
+        if self.data.get("tomatoes_date") == today:
+            return False
+        self.data["tomatoes"] = 0
+        self.data["tomatoes_date"] = today
+        return True
+
+    def _build_task_index(self):
+        # 老数据里的任务可能是纯字符串或没有 id，统一补成带 id 的 Task；
+        # 之后任务只在索引里，self.data["tasks"] 只在存盘时临时生成
+        self.task_index = {}
+        self.task_buckets = {p: {} for p in PRIORITY_ORDER}
+        for obj in self.data.pop("tasks", None) or []:
+            task_item = Task.from_json(obj)
+            if not task_item.id or task_item.id in self.task_index:
+                task_item.id = self._new_id()
+            self._index_task(task_item)
+
+    def _index_task(self, task_item):
+        self.task_index[task_item.id] = task_item
+        self.task_buckets[task_item.priority][task_item.id] = task_item
+
+    def _build_countdown_index(self):
+        self.countdown_index = {}
+        self.countdown_order = []
+        self._countdown_ordinals = {}
+        for obj in self.data.pop("countdowns", None) or []:
+            event = Countdown.from_json(obj)
+            if not event.id or event.id in self.countdown_index:
+                event.id = self._new_id()
+            self._index_countdown(event)
+        self._next_countdown_day = None
+
+    def _index_countdown(self, event):
+        ordinal = date_ordinal(event.date)
+        self.countdown_index[event.id] = event
+        self._countdown_ordinals[event.id] = ordinal
+        # 日期写坏的老数据排在最前面，天数按 0 显示(和以前一致)
+        bisect.insort(self.countdown_order, (ordinal or 0, event.id))
+        self._next_countdown_day = None
+
+    @staticmethod
+    def _new_id():
+        return uuid.uuid4().hex[:12]
 
     def save_data(self):
-        try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-        except:
-            pass
+        self.loaded.wait()
+        with tracer.span("storage"):
+            try:
+                with M_SAVE_SECONDS.time():
+                    with open(self.data_file, 'w', encoding='utf-8') as f:
+                        json.dump(self.storage_view(), f, ensure_ascii=False, indent=2, check_circular=False)
+            except Exception as e:
+                M_SAVE_FAILURES.inc(error=type(e).__name__)
+            self.write_home_snapshot()
+
+    def storage_view(self):
+        """要写进文件的内容：任务、倒计时临时转回原来的 JSON 形状，写完就丢"""
+        view = dict(self.data)
+        view["tasks"] = [t.to_json() for t in self.task_index.values()]
+        view["countdowns"] = [self.countdown_index[i].to_json() for _, i in self.countdown_order]
+        return view
+
+    def data_sizes(self):
+        """各类记录的条数，处理函数追踪按它给耗时分档"""
+        return {"tasks": len(self.task_index), "countdowns": len(self.countdown_index),
+                "history": len(self.data.get("history", ())), "days": len(self.data.get("daily_stats", ()))}
 
     def get_main_days_left(self):
         return self.calculate_days(self.data.get("target_date", "2025-12-20"))
 
     def calculate_days(self, date_str):
-        try:
-            target = datetime.strptime(date_str, "%Y-%m-%d").date()
-            today = datetime.now().date()
-            return (target - today).days
-        except:
+        target = date_ordinal(date_str)
+        if target is None:
             return 0
+        return target - day_clock.today_ordinal
 
     def update_settings(self, name, date, city, focus_min, break_min):
+        self.loaded.wait()
         self.data["target_name"] = name
         self.data["target_date"] = date
         self.data["city"] = city
@@ -76,102 +526,233 @@ class StudyLogic:
         self.save_data()
 
     def add_task(self, text, priority="green"):
+        self.loaded.wait()
+        if priority not in self.task_buckets:
+            priority = "green"
         if text:
-            task_obj = {
-                "text": text,
-                "priority": priority,
-                "created": datetime.now().strftime("%Y-%m-%d")
-            }
-            self.data["tasks"].append(task_obj)
-            self.save_data()
-
-    def remove_task(self, index):
-        if 0 <= index < len(self.data["tasks"]):
-            task_item = self.data["tasks"][index]
-            content = task_item["text"] if isinstance(task_item, dict) else task_item
-            self.data["tasks"].pop(index)
-            time_str = datetime.now().strftime("%H:%M")
-            self.data["history"].append(f"[{time_str}] 爪子一挥，完成: {content}")
+            task_obj = Task(self._new_id(), text, priority, day_clock.today_str)
+            self._index_task(task_obj)
             self.save_data()
+            return task_obj
+        return None
+
+    def remove_task(self, task_id):
+        self.loaded.wait()
+        # 按 id 删除，界面上过期的点击最多是删不到，不会误删别的任务
+        task_item = self.task_index.pop(task_id, None)
+        if task_item is None:
+            return False
+        self.task_buckets[task_item.priority].pop(task_id, None)
+        time_str = datetime.now().strftime("%H:%M")
+        self.add_history(f"[{time_str}] 爪子一挥，完成: {task_item.text}")
+        self.save_data()
+        return True
+
+    def get_task(self, task_id):
+        return self.task_index.get(task_id)
+
+    def iter_tasks(self, urgent_first=False, priority=None):
+        """按添加顺序遍历；urgent_first 时按 红→橙→绿 逐桶遍历，priority 只看某一档"""
+        if priority is not None:
+            return iter(self.task_buckets.get(priority, {}).values())
+        if urgent_first:
+            return itertools.chain.from_iterable(self.task_buckets[p].values() for p in PRIORITY_ORDER)
+        return iter(self.task_index.values())
+
+    def top_urgent_tasks(self, n=3):
+        """最急的 n 个任务(红、橙两档)，只走到第 n 个就停"""
+        if not self.loaded.is_set() and self._snapshot:
+            return [Task("", text) for text in self._snapshot.get("urgent", [])[:n]]
+        urgent = itertools.chain(self.task_buckets["red"].values(), self.task_buckets["orange"].values())
+        return list(itertools.islice(urgent, n))
+
+    def task_position(self, task_id, urgent_first=False):
+        """新任务在展示列表里的位置(总是排在同档的最后)"""
+        task_item = self.task_index[task_id]
+        if not urgent_first:
+            return len(self.task_index) - 1
+        pos = 0
+        for p in PRIORITY_ORDER:
+            pos += len(self.task_buckets[p])
+            if p == task_item.priority:
+                return pos - 1
+        return pos - 1
+
+    def task_count(self, priority=None):
+        if not self.loaded.is_set() and self._snapshot and priority is None:
+            return self._snapshot.get("task_count", 0)
+        if priority is not None:
+            return len(self.task_buckets.get(priority, {}))
+        return len(self.task_index)
 
     def add_countdown_event(self, title, date_str):
-        try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-            self.data["countdowns"].append({"title": title, "date": date_str})
-            self.save_data()
-            return True
-        except:
+        """成功返回新事件，日期写错返回 None"""
+        self.loaded.wait()
+        if date_ordinal(date_str) is None:
+            return None
+        event = Countdown(self._new_id(), title, date_str)
+        self._index_countdown(event)
+        self.save_data()
+        return event
+
+    def remove_countdown_event(self, event_id):
+        self.loaded.wait()
+        event = self.countdown_index.pop(event_id, None)
+        if event is None:
             return False
+        ordinal = self._countdown_ordinals.pop(event_id)
+        pos = bisect.bisect_left(self.countdown_order, (ordinal or 0, event_id))
+        del self.countdown_order[pos]
+        self._next_countdown_day = None
+        time_str = datetime.now().strftime("%H:%M")
+        self.add_history(f"[{time_str}] 🗑️ 埋掉旧目标: {event.title}")
+        self.save_data()
+        return True
 
-    def remove_countdown_event(self, index):
-        if 0 <= index < len(self.data["countdowns"]):
-            event = self.data["countdowns"][index]
-            self.data["countdowns"].pop(index)
-            time_str = datetime.now().strftime("%H:%M")
-            self.data["history"].append(f"[{time_str}] 🗑️ 埋掉旧目标: {event['title']}")
-            self.save_data()
+    def iter_countdowns(self):
+        """按日期从近到远遍历"""
+        return (self.countdown_index[i] for _, i in self.countdown_order)
+
+    def countdown_position(self, event_id):
+        ordinal = self._countdown_ordinals[event_id]
+        return bisect.bisect_left(self.countdown_order, (ordinal or 0, event_id))
+
+    def countdown_days_left(self, event_id):
+        ordinal = self._countdown_ordinals.get(event_id)
+        if ordinal is None:
+            return 0
+        return ordinal - day_clock.today_ordinal
+
+    def next_countdown(self):
+        """今天及以后最近的一个截止日；每天只二分查找一次，之后直接返回缓存"""
+        today = day_clock.today_ordinal
+        if self._next_countdown_day != today:
+            pos = bisect.bisect_left(self.countdown_order, (today, ""))
+            if pos < len(self.countdown_order):
+                self._next_countdown = self.countdown_index[self.countdown_order[pos][1]]
+            else:
+                self._next_countdown = None
+            self._next_countdown_day = today
+        return self._next_countdown
+
+    def add_history(self, entry):
+        history = self.data["history"]
+        entry = sys.intern(entry)
+        history.append(entry)
+        if self._history_index is not None:
+            self._index_history_entry(len(history) - 1, entry)
+
+    def _index_history_entry(self, i, entry):
+        for token in tokenize(entry):
+            self._history_index.setdefault(token, []).append(i)
+
+    def _ensure_history_index(self):
+        if self._history_index is None:
+            self._history_index = {}
+            for i, entry in enumerate(self.data["history"]):
+                self._index_history_entry(i, entry)
+
+    def search_history(self, query):
+        """返回匹配的条目下标(新的在前)。查询里各个字的倒排表取交集，再按原文确认一遍整段包含"""
+        history = self.data["history"]
+        query = query.strip().lower()
+        if not query:
+            return range(len(history) - 1, -1, -1)
+        tokens = tokenize(query)
+        if not tokens:
+            # 只有英文/数字，索引帮不上，老实扫一遍
+            return [i for i in range(len(history) - 1, -1, -1) if query in history[i].lower()]
+        self._ensure_history_index()
+        postings = sorted((self._history_index.get(t, []) for t in tokens), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for plist in postings[1:]:
+            candidates.intersection_update(plist)
+            if not candidates:
+                return []
+        return [i for i in sorted(candidates, reverse=True) if query in history[i].lower()]
+
+    def history_page(self, matches, offset, limit):
+        """按页取条目；matches 是 search_history 的结果"""
+        history = self.data["history"]
+        return [history[i] for i in matches[offset:offset + limit]]
 
     def increment_tomato(self):
+        self.loaded.wait()
+        self.roll_daily_counters()
         self.data["tomatoes"] += 1
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = day_clock.today_str
         if today not in self.data.get("daily_stats", {}):
             self.data["daily_stats"][today] = 0
         self.data["daily_stats"][today] += 1
+        self._focus_model = None
         time_str = datetime.now().strftime("%H:%M")
-        self.data["history"].append(f"[{time_str}] 捕获一只番茄 🍅 (嚼嚼嚼)")
+        self.add_history(f"[{time_str}] 捕获一只番茄 🍅 (嚼嚼嚼)")
         self.save_data()
         return self.data["tomatoes"]
 
     def clear_daily_stats(self):
+        self.loaded.wait()
         self.data["tomatoes"] = 0
         self.save_data()
 
     def check_in(self):
-        today = datetime.now().strftime("%Y-%m-%d")
+        self.loaded.wait()
+        today = day_clock.today_str
         last = self.data.get("last_checkin", "")
         if last == today: return False, "喵？今天已经按过爪印啦！"
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        yesterday = day_clock.yesterday_str
         if last == yesterday:
             self.data["streak_days"] = self.data.get("streak_days", 0) + 1
         else:
             self.data["streak_days"] = 1
         self.data["last_checkin"] = today
         time_str = datetime.now().strftime("%H:%M")
-        self.data["history"].append(f"[{time_str}] 🐾 按下今日爪印")
+        self.add_history(f"[{time_str}] 🐾 按下今日爪印")
         self.save_data()
         return True, f"喵！签到成功！连签 {self.data['streak_days']} 天 🎉"
 
     def is_checked_in(self):
-        return self.data.get("last_checkin") == datetime.now().strftime("%Y-%m-%d")
+        return self.data.get("last_checkin") == day_clock.today_str
 
     def get_random_quote(self):
-        quotes = [
-            "既然上了贼船\n就做个快乐的海盗猫",
-            "与其仰望星空\n不如去抓那只蝴蝶",
-            "哪怕是流浪猫\n也有看夕阳的权利",
-            "保持好奇心\n是猫咪长寿的秘诀",
-            "没有什么烦恼\n是一个罐头解决不了的",
-            "只要步履不停\n小鱼干终将抵达",
-            "现在的努力\n是为了以后能躺平晒太阳"
-        ]
-        return random.choice(quotes)
+        return random.choice(QUOTES)
 
     def fetch_weather(self):
         city = self.data.get("city", "郑州")
+        start = time.perf_counter()
         try:
             url = f"https://wttr.in/{city}?format=%C+%t&lang=zh&_={int(time.time())}"
             headers = {"User-Agent": "Mozilla/5.0"}
+            requests = optional_import("requests")
+            if requests is None:
+                M_WEATHER_TOTAL.inc(outcome="no_module")
+                return f"{city}: 没有联网模块，看不了天气"
             res = requests.get(url, timeout=10, headers=headers)
+            M_WEATHER_SECONDS.observe(time.perf_counter() - start)
             if res.status_code == 200:
+                M_WEATHER_TOTAL.inc(outcome="ok")
                 current_time = datetime.now().strftime("%H:%M")
                 return f"{city} {res.text.strip()} ({current_time})"
+            M_WEATHER_TOTAL.inc(outcome=f"http_{res.status_code}")
             return f"{city}: 信号被外星猫劫持了"
-        except:
+        except Exception as e:
+            M_WEATHER_SECONDS.observe(time.perf_counter() - start)
+            M_WEATHER_TOTAL.inc(outcome=type(e).__name__)
             return "网络线被咬断了..."
 
+    def focus_model(self):
+        """全部历史的日历热力图/月/年统计；跨天或抓到新番茄才重算"""
+        self.loaded.wait()
+        today = day_clock.today_ordinal
+        if self._focus_model is None or self._focus_model[0] != today:
+            self._focus_model = (today, aggregate_focus(self.data.get("daily_stats", {}), today))
+        return self._focus_model[1]
+
     def get_weekly_data(self):
         stats = []
-        today = datetime.now().date()
+        today = day_clock.today
         for i in range(6, -1, -1):
             day = today - timedelta(days=i)
             day_str = day.strftime("%Y-%m-%d")
@@ -181,66 +762,761 @@ class StudyLogic:
 
 
 # ==========================================
-# 2. 界面层 (功能增强版)
+# 2. 刷新调度 (合并同一帧内的 page.update)
 # ==========================================
+class UpdateBatcher:
+    """每个会话一个：把零散的刷新请求攒起来，每帧最多真正刷新一次"""
+
+    def __init__(self, page, frame_interval=1 / 30):
+        self.page = page
+        self.frame_interval = frame_interval
+        self.requested = 0  # 调用方请求刷新的次数
+        self.flushed = 0  # 实际发送 page.update 的次数
+        self._dirty = {}  # id(control) -> control，保持请求顺序
+        self._full = False  # 是否需要整页刷新
+        self._last_flush = 0.0
+        self._closed = False
+        self._flushing = 0  # 正在发送的刷新数(flush_now 可能和后台线程同时发)
+        self._cond = threading.Condition()
+        # Flet 差分时直接遍历控件的 children 列表，别的线程同时往里插行会让新行“记在账上却没发出去”，
+        # 之后这个容器再也刷新不了。增删子控件的地方都要拿这把锁
+        self.lock = threading.RLock()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def request(self, *controls):
+        """标记控件为脏；不传控件表示整页刷新。真正的刷新由后台线程按帧合并"""
+        with self._cond:
+            self._mark(controls)
+            self._cond.notify_all()
+
+    def flush_now(self, *controls):
+        """延迟敏感的路径(按钮反馈、铃声)用：立刻把积攒的改动连同本次一起发出去"""
+        with self._cond:
+            self._mark(controls)
+        self._flush()
+
+    def open_dialog(self, control):
+        """page.open 会往页面的 offstage 列表里加控件，和增删子控件一样要拿锁"""
+        with self.lock:
+            self.page.open(control)
+
+    def close_dialog(self, control):
+        with self.lock:
+            self.page.close(control)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=5):
+        """等攒着的和正在发的刷新都发完；基准里每步操作后用它对齐，让刷新次数可复现"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._closed or not (self._full or self._dirty or self._flushing),
+                                       timeout)
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "flushed": self.flushed,
+            "coalesced": self.requested - self.flushed,
+        }
+
+    def _mark(self, controls):
+        self.requested += 1
+        M_UPDATE_REQUESTS.inc()
+        if controls:
+            for c in controls:
+                self._dirty[id(c)] = c
+        else:
+            self._full = True
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not (self._full or self._dirty):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                delay = self._last_flush + self.frame_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._flush()
+
+    def _flush(self):
+        with self._cond:
+            full = self._full
+            dirty = list(self._dirty.values())
+            self._full = False
+            self._dirty.clear()
+            if not full and not dirty:
+                return
+            self._last_flush = time.monotonic()
+            self.flushed += 1
+            self._flushing += 1
+        # 还没挂到页面上的控件没法单独刷新，退回整页刷新
+        if not full and any(c.page is None for c in dirty):
+            full = True
+        start = time.perf_counter()
+        try:
+            with self.lock, tracer.span("ui"):
+                if full:
+                    self.page.update()
+                else:
+                    self.page.update(*dirty)
+            M_PAGE_UPDATES.inc(kind="full" if full else "partial")
+            M_PAGE_UPDATE_SECONDS.observe(time.perf_counter() - start)
+        except Exception as e:
+            M_PAGE_UPDATE_ERRORS.inc(error=type(e).__name__)
+        finally:
+            with self._cond:
+                self._flushing -= 1
+                self._cond.notify_all()
+
+
+class KeyedList:
+    """按 key 复用行控件：增删一行只新建/丢弃那一行，其余行原样保留。
+    行按 chunk 条一组装进子 Column，insert/remove 返回真正变了的那个控件(通常只是一组)，
+    调用方只刷新它：Flet 刷新一个控件会把它下面的子控件全比一遍，刷整个列表就是几千行都比一遍。
+    末尾预留几个空组，往后加的行先填进去；空组用完要往容器里加组时才刷新整个容器"""
+
+    CHUNK = 50
+    SPARE_CHUNKS = 4
+
+    def __init__(self, container, build_row, empty=None, lock=None, chunk=CHUNK):
+        self.container = container  # ListView / Column
+        self.build_row = build_row  # (key, item) -> Control
+        self.empty = empty  # 没有数据时显示的占位控件
+        self.chunk = chunk
+        self.rows = {}  # key -> 行控件
+        self.chunks = []  # 子 Column，按显示顺序；删空了的组留在原处，下次 sync 再整理
+        self.lock = lock or threading.RLock()  # 传 UpdateBatcher.lock，和发送差分互斥
+
+    def _new_chunk(self, rows=()):
+        return ft.Column(list(rows), spacing=self.container.spacing or 0)
+
+    def _show_chunks(self):
+        self.container.controls = list(self.chunks) if self.rows else self._empty_controls()
+        return self.container
+
+    def sync(self, items):
+        """items: [(key, item), ...]，按给定顺序对齐；只为新 key 建行。整个列表都重排了，调用方刷新容器"""
+        rows = {}
+        for key, item in items:
+            row = self.rows.get(key)
+            if row is None:
+                row = self.build_row(key, item)
+            rows[key] = row
+        ordered = list(rows.values())
+        with self.lock:
+            self.rows = rows
+            self.chunks = [self._new_chunk(ordered[i:i + self.chunk]) for i in range(0, len(ordered), self.chunk)]
+            self.chunks += [self._new_chunk() for _ in range(self.SPARE_CHUNKS)]
+            self._show_chunks()
+
+    def _tail_chunk(self):
+        """插到最后时放进哪一组：最后一个有行的组没满就是它，否则是它后面的空组；返回 (组, 是否新加了组)"""
+        last = max((i for i, chunk in enumerate(self.chunks) if chunk.controls), default=-1)
+        if last >= 0 and len(self.chunks[last].controls) < self.chunk:
+            return self.chunks[last], False
+        if last + 1 < len(self.chunks):
+            return self.chunks[last + 1], False
+        self.chunks += [self._new_chunk() for _ in range(self.SPARE_CHUNKS + 1)]
+        return self.chunks[last + 1], True
+
+    def insert(self, key, item, at=None):
+        """在第 at 行(默认最后)插入；返回要刷新的控件，key 已存在时返回 None"""
+        if key in self.rows:
+            return None
+        row = self.build_row(key, item)
+        with self.lock:
+            relayout = not self.rows  # 之前显示的是占位控件
+            offset = len(self.rows) if at is None else at
+            self.rows[key] = row
+            target = None
+            for chunk in self.chunks:
+                if offset < len(chunk.controls):
+                    target = chunk
+                    break
+                offset -= len(chunk.controls)
+            if target is None:
+                target, added = self._tail_chunk()
+                offset = len(target.controls)
+                relayout = relayout or added
+            target.controls.insert(offset, row)
+            if len(target.controls) > 2 * self.chunk:
+                # 中间插得太多，一分为二，免得一组越长越大
+                half = len(target.controls) // 2
+                self.chunks.insert(self.chunks.index(target) + 1, self._new_chunk(target.controls[half:]))
+                del target.controls[half:]
+                relayout = True
+            return self._show_chunks() if relayout else target
+
+    def remove(self, key):
+        """返回要刷新的控件，key 不存在时返回 None"""
+        with self.lock:
+            row = self.rows.pop(key, None)
+            if row is None:
+                return None
+            for chunk in self.chunks:
+                if row in chunk.controls:
+                    chunk.controls.remove(row)
+                    break
+            else:
+                return None
+            return chunk if self.rows else self._show_chunks()
+
+    def _empty_controls(self):
+        return [self.empty] if self.empty is not None else []
+
+
+# ==========================================
+# 3. 音频：资源索引 + 通道池 (BGM 常驻预加载，切歌不重新加载)
+# ==========================================
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_EXTS = (".mp3", ".ogg", ".wav", ".m4a")
+# 这些文件有固定用途(铃声、保活静音、呼噜声)，不进 BGM 播放列表
+EFFECT_FILES = {"alarm.mp3", "silent.mp3", "purr.mp3"}
+
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG1 Layer III
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),  # MPEG2/2.5 Layer III
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def read_assets_dir(app_dir=APP_DIR):
+    """从 flet.toml 读 [flutter] assets_dir；仓库里放的是 flet.toml.txt，也认"""
+    for name in ("flet.toml", "flet.toml.txt"):
+        path = os.path.join(app_dir, name)
+        try:
+            with open(path, "rb") as f:
+                config = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError):
+            continue
+        return config.get("flutter", {}).get("assets_dir", "assets")
+    return "assets"
+
+
+def mp3_duration(path):
+    """只读文件头估算 MP3 时长(秒)：有 Xing/Info 头按帧数算，否则按首帧码率当 CBR 算；认不出返回 None"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(10)
+            offset = 0
+            if head[:3] == b"ID3":  # 跳过 ID3v2 标签
+                offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+            f.seek(offset)
+            buf = f.read(64 * 1024)
+    except OSError:
+        return None
+    for i in range(len(buf) - 4):
+        if buf[i] != 0xFF or (buf[i + 1] & 0xE0) != 0xE0:
+            continue
+        version = (buf[i + 1] >> 3) & 0x3  # 3=MPEG1 2=MPEG2 0=MPEG2.5
+        layer = (buf[i + 1] >> 1) & 0x3  # 1=Layer III
+        bitrate_idx = buf[i + 2] >> 4
+        rate_idx = (buf[i + 2] >> 2) & 0x3
+        if version == 1 or layer != 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+            continue
+        mpeg1 = version == 3
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (buf[i + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+        xing = i + 4 + side_info
+        if buf[xing:xing + 4] in (b"Xing", b"Info") and buf[xing + 7] & 0x1:
+            frames = int.from_bytes(buf[xing + 8:xing + 12], "big")
+            return round(frames * samples_per_frame / sample_rate, 2)
+        bitrate = _MP3_BITRATES[1 if mpeg1 else 2][bitrate_idx] * 1000
+        return round((size - offset - i) * 8 / bitrate, 2)
+    return None
+
+
+def _manifest_files_unchanged(folder, files):
+    # 原地覆盖一个文件不会改目录的 mtime，所以缓存里的几个音频文件还要各自 stat 一下
+    for entry in files:
+        try:
+            st = os.stat(os.path.join(folder, entry["file"]))
+        except (OSError, KeyError):
+            return False
+        if st.st_size != entry.get("size") or st.st_mtime != entry.get("mtime"):
+            return False
+    return True
+
+
+def load_asset_manifest(assets_dir=None, cache_file="asset_manifest.json"):
+    """扫描资源目录里的音频，结果缓存到 cache_file。
+    目录 mtime 和每个音频文件的大小、mtime 都没变就直接用缓存；否则重扫，没变的文件沿用缓存里的时长"""
+    assets_dir = assets_dir or read_assets_dir()
+    folder = os.path.join(APP_DIR, assets_dir)
+    try:
+        dir_mtime = os.stat(folder).st_mtime
+    except OSError:
+        return {"assets_dir": assets_dir, "dir_mtime": None, "files": []}
+    cached = {}
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if (cached.get("assets_dir") == assets_dir and cached.get("dir_mtime") == dir_mtime
+                and _manifest_files_unchanged(folder, cached.get("files", []))):
+            return cached
+    except (OSError, ValueError):
+        pass
+    known = {e["file"]: e for e in cached.get("files", [])}
+    files = []
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if not entry.is_file() or not entry.name.lower().endswith(AUDIO_EXTS):
+            continue
+        st = entry.stat()
+        old = known.get(entry.name)
+        if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+            files.append(old)
+            continue
+        files.append({
+            "file": entry.name,
+            "src": f"{assets_dir}/{entry.name}",
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "duration": mp3_duration(entry.path) if entry.name.lower().endswith(".mp3") else None,
+        })
+    manifest = {"assets_dir": assets_dir, "dir_mtime": dir_mtime, "files": files}
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+    return manifest
+
+
+def bgm_playlist_from_manifest(manifest):
+    playlist = []
+    for entry in manifest["files"]:
+        if entry["file"] in EFFECT_FILES:
+            continue
+        stem = os.path.splitext(entry["file"])[0]
+        playlist.append({
+            "name": f"纯音乐 {stem}" if stem.isdigit() else stem,
+            "src": entry["src"],
+            "duration": entry["duration"],
+        })
+    return playlist
+
+
+_asset_manifest = None
+
+
+def get_asset_manifest():
+    """进程内只读一次清单(缓存文件命中时只 stat 资源目录和那几个音频文件)"""
+    global _asset_manifest
+    if _asset_manifest is None:
+        _asset_manifest = load_asset_manifest()
+    return _asset_manifest
+
+
+class AudioChannelPool:
+    """固定三个常驻的 Audio 控件：静音保活轨、正在放的歌、预加载好的下一首，挂上页面时就开始预加载。
+    切到已经加载的歌只是暂停一个通道、播放另一个，不会重新解码；切到别的歌才改空闲通道的 src。
+    资源目录里歌再多，每个客户端也只加载这几首"""
+
+    FADE_STEP = 0.05  # 淡入淡出每一步的间隔(秒)
+    MUSIC_CHANNELS = 2  # 当前一首 + 下一首
+
+    def __init__(self, flet_audio, ui, silence_src, music_srcs=(), crossfade_ms=300):
+        self.ui = ui
+        self.crossfade_ms = crossfade_ms
+
+        def channel(src):
+            return flet_audio.Audio(src=src, autoplay=False, release_mode="loop", volume=1.0)
+
+        self.silence = channel(silence_src)
+        self.music = [channel(src) for src in list(dict.fromkeys(music_srcs))[:self.MUSIC_CHANNELS]]
+        self.current = None  # 当前选中的 src
+        self.active = None  # 当前选中的通道
+        self.playing = False
+        self.switch_ms = collections.deque(maxlen=200)  # 最近的切换延迟(毫秒)
+        self._lock = threading.RLock()
+        # 每次切换/暂停加一；还没淡完的淡入淡出发现代数变了就直接撒手，不再碰任何通道
+        self._fade_gen = 0
+        self._fading_out = None  # 正在淡出的通道
+
+    def controls(self):
+        return [self.silence] + self.music
+
+    def _spare(self, *busy):
+        return next((ch for ch in self.music if ch not in busy), None)
+
+    def _channel_for(self, src):
+        if src == self.silence.src:
+            return self.silence
+        for ch in self.music:
+            if ch.src == src:
+                return ch
+        # 没预加载过：占一个没在放的音乐通道，换 src 重新加载
+        spare = self._spare(self.active) or self.music[0]
+        spare.pause()
+        spare.volume = 1.0
+        spare.src = src
+        self.ui.flush_now(spare)
+        return spare
+
+    def _load(self, channel, src):
+        if channel is not None and src is not None and channel.src != src:
+            channel.src = src
+            self.ui.request(channel)
+
+    def select(self, src, play, preload=None):
+        """切到 src 对应的通道；play 为 True 时立即(正在播放则淡入淡出)开始播放。
+        preload 是接下来可能切到的歌，切完把空闲的音乐通道换成它"""
+        t0 = time.perf_counter()
+        with self._lock:
+            self._fade_gen += 1
+            stale, self._fading_out = self._fading_out, None
+            if preload is not None and any(ch.src == preload for ch in self.music):
+                preload = None
+            new = self._channel_for(src)
+            old = self.active if self.active is not new else None
+            was_playing = self.playing
+            self.current = src
+            self.active = new
+            if stale is not None and stale is not new and stale is not old:
+                # 上一次淡入淡出被打断，淡出到一半的通道还在响
+                stale.pause()
+                stale.volume = 1.0
+                self.ui.request(stale)
+            if not play:
+                self.pause()
+                self._load(self._spare(new), preload)
+                return
+            if old is not None and was_playing and self.crossfade_ms > 0:
+                if new is not stale:  # 切回正在淡出的那首：从它现在的音量接着淡入
+                    new.volume = 0
+                    self.ui.flush_now(new)
+                new.play()
+                self._fading_out = old
+                threading.Thread(target=self._crossfade, args=(old, new, preload, self._fade_gen),
+                                 daemon=True).start()
+            else:
+                if old is not None:
+                    old.pause()
+                if new.volume != 1.0:  # 被打断的淡入淡出可能留下半截音量
+                    new.volume = 1.0
+                    self.ui.request(new)
+                new.play()
+                self._load(self._spare(new), preload)
+            self.playing = True
+        self.switch_ms.append((time.perf_counter() - t0) * 1000)
+
+    def play(self):
+        with self._lock:
+            if self.active is not None:
+                self.active.play()
+                self.playing = True
+
+    def pause(self):
+        with self._lock:
+            self._fade_gen += 1
+            self._fading_out = None
+            if self.playing:
+                for channel in self.controls():
+                    channel.pause()
+            # 淡入淡出停在半路的通道把音量还原，下次播放不会忽大忽小
+            faded = [ch for ch in self.controls() if ch.volume != 1.0]
+            for channel in faded:
+                channel.volume = 1.0
+            if faded:
+                self.ui.request(*faded)
+            self.playing = False
+
+    def _crossfade(self, old, new, preload, generation):
+        steps = max(1, int(self.crossfade_ms / 1000 / self.FADE_STEP))
+        with self._lock:
+            start_new, start_old = new.volume, old.volume
+        for i in range(1, steps + 1):
+            with self._lock:
+                if generation != self._fade_gen:
+                    return
+                new.volume = start_new + (1 - start_new) * i / steps
+                old.volume = start_old * (1 - i / steps)
+                self.ui.request(new, old)
+            time.sleep(self.FADE_STEP)
+        with self._lock:
+            if generation != self._fade_gen:
+                return
+            self._fading_out = None
+            if old is not self.active:
+                old.pause()
+                old.volume = 1.0
+                self.ui.request(old)
+            # 淡出完的通道空出来了，换成下一首预加载
+            self._load(self._spare(self.active), preload)
+
+    def stats(self):
+        samples = sorted(self.switch_ms)
+        if not samples:
+            return {"switches": 0}
+        return {
+            "switches": len(samples),
+            "p50_ms": round(samples[len(samples) // 2], 3),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "max_ms": round(samples[-1], 3),
+        }
+
+
+# ==========================================
+# 4. 分享海报 (离线画成 PNG，按内容缓存)
+# ==========================================
+# 需要 Pillow(已写进 requirements.txt)和一款能显示中文的字体。仓库不自带字体(太大)：Android、macOS、
+# Windows 和装了 Noto CJK / 文泉驿的 Linux 都能直接找到；没有中文字体的服务器，把 .ttf/.otf/.ttc
+# 放进 assets 目录就行。两样缺一样时 render_share_poster 返回 None，分享退回到原来的截图弹窗
+POSTER_SIZE = (600, 900)  # 控件版海报 300x450 的两倍，截图分享不糊
+POSTER_CACHE_DIR = "poster_cache"
+POSTER_CACHE_KEEP = 30  # 最多留几张，按最近使用淘汰
+POSTER_WEB_DIR = "posters"  # 网页版：海报复制到资源目录下的这个子目录，由 Flet 的静态文件服务提供下载
+POSTER_FONT_CANDIDATES = (
+    # Android
+    "/system/fonts/NotoSansCJK-Regular.ttc", "/system/fonts/NotoSansSC-Regular.otf",
+    "/system/fonts/DroidSansFallback.ttf",
+    # Linux
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc", "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
+    # macOS / Windows
+    "/System/Library/Fonts/PingFang.ttc", "/System/Library/Fonts/STHeiti Medium.ttc",
+    "C:/Windows/Fonts/msyh.ttc", "C:/Windows/Fonts/simhei.ttf",
+)
+_poster_lock = threading.Lock()
+
+
+def _font_has_cjk(path):
+    # 缺字时画出来的是同一个“豆腐块”，和一个肯定不存在的字符比一比；用简体字试，日文字体会缺
+    Image, ImageDraw, ImageFont = (optional_import(f"PIL.{m}") for m in ("Image", "ImageDraw", "ImageFont"))
+    try:
+        font = ImageFont.truetype(path, 32)
+    except OSError:
+        return False
+    glyphs = []
+    for ch in ("鱼", "\U0010FFFD"):
+        img = Image.new("L", (40, 40))
+        ImageDraw.Draw(img).text((0, 0), ch, font=font, fill=255)
+        glyphs.append(img.tobytes())
+    return glyphs[0] != glyphs[1]
+
+
+@lru_cache(maxsize=1)
+def find_cjk_font():
+    """先找 assets 里自带的字体，再找系统字体；都不能显示中文就返回 None"""
+    if optional_import("PIL.ImageFont") is None:
+        return None
+    assets_dir = os.path.join(APP_DIR, read_assets_dir())
+    bundled = []
+    if os.path.isdir(assets_dir):
+        bundled = [os.path.join(assets_dir, n) for n in sorted(os.listdir(assets_dir))
+                   if n.lower().endswith((".ttf", ".otf", ".ttc"))]
+    for path in itertools.chain(bundled, POSTER_FONT_CANDIDATES):
+        if os.path.isfile(path) and _font_has_cjk(path):
+            return path
+    return None
+
+
+def poster_key(poster):
+    """海报内容的指纹：内容一样就是同一张图"""
+    raw = json.dumps(poster, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def _draw_paw(draw, cx, cy, r, color):
+    draw.ellipse((cx - r, cy - r * 0.6, cx + r, cy + r), fill=color)
+    for dx, dy in ((-1.1, -1.2), (-0.4, -1.7), (0.4, -1.7), (1.1, -1.2)):
+        x, y = cx + dx * r, cy + dy * r
+        draw.ellipse((x - r * 0.35, y - r * 0.4, x + r * 0.35, y + r * 0.4), fill=color)
+
+
+def draw_poster(poster, font_path):
+    """把海报画成一张 PIL 图片；版式照着控件版海报来"""
+    Image, ImageDraw, ImageFont = (optional_import(f"PIL.{m}") for m in ("Image", "ImageDraw", "ImageFont"))
+    w, h = POSTER_SIZE
+    fg, grey = poster["fg"], "#9E9E9E"
+    img = Image.new("RGB", (w, h), poster["bg"])
+    draw = ImageDraw.Draw(img)
+    draw.rounded_rectangle((4, 4, w - 5, h - 5), radius=40, outline=fg, width=8)
+
+    def font(size):
+        return ImageFont.truetype(font_path, size)
+
+    def center(text, y, size, color, bold=False):
+        f = font(size)
+        draw.multiline_text((w / 2, y), text, font=f, fill=color, anchor="ma", align="center", spacing=size // 3,
+                            stroke_width=2 if bold else 0, stroke_fill=color)
+
+    center(f"{poster['date']} {poster['weekday']}", 64, 28, grey)
+    draw.line((60, 116, w - 60, 116), fill=fg, width=2)
+    center("今日战绩", 170, 32, fg)
+    center(str(poster["tomatoes"]), 212, 160, fg, bold=True)
+    center(f"条小鱼干 ({poster['minutes']}分钟)", 400, 28, grey)
+    center(poster["emoji"], 480, 56, fg)
+    center(poster["quote"], 590, 28, fg)
+    draw.line((60, 790, w - 60, 790), fill=fg, width=2)
+    brand_font = font(30)
+    brand_w = draw.textlength(poster["brand"], font=brand_font)
+    x0 = (w - brand_w - 50) / 2
+    _draw_paw(draw, x0 + 16, 832, 14, fg)
+    draw.text((x0 + 50, 815), poster["brand"], font=brand_font, fill=fg, stroke_width=1, stroke_fill=fg)
+    return img
+
+
+def _trim_poster_cache(cache_dir, keep):
+    files = [os.path.join(cache_dir, n) for n in os.listdir(cache_dir) if n.endswith(".png")]
+    if len(files) <= keep:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def render_share_poster(poster, cache_dir=POSTER_CACHE_DIR, keep=POSTER_CACHE_KEEP):
+    """返回海报 PNG 的路径；同样的内容只画一次。没装 Pillow 或找不到中文字体时返回 None"""
+    path = os.path.join(cache_dir, poster_key(poster) + ".png")
+    with _poster_lock:
+        if os.path.exists(path):
+            os.utime(path)  # 记一下最近用过
+            return path
+        font_path = find_cjk_font()
+        if font_path is None:
+            return None
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        draw_poster(poster, font_path).save(tmp, "PNG", optimize=False)
+        os.replace(tmp, path)
+        _trim_poster_cache(cache_dir, keep)
+    return path
+
+
+def publish_poster(path, keep=POSTER_CACHE_KEEP):
+    """网页版保存海报用：把缓存里的 PNG 复制到资源目录，返回相对 URL。
+    Flet 只在启动时资源目录已经存在才提供静态文件，没有资源目录就返回 None"""
+    assets_dir = os.path.join(APP_DIR, read_assets_dir())
+    if not os.path.isdir(assets_dir):
+        return None
+    web_dir = os.path.join(assets_dir, POSTER_WEB_DIR)
+    name = os.path.basename(path)
+    target = os.path.join(web_dir, name)
+    with _poster_lock:
+        if os.path.exists(target):
+            os.utime(target)
+        else:
+            os.makedirs(web_dir, exist_ok=True)
+            shutil.copyfile(path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+            _trim_poster_cache(web_dir, keep)
+    return f"{POSTER_WEB_DIR}/{name}"
+
+
+@lru_cache(maxsize=8)
+def poster_base64(path):
+    # 路径就是内容指纹，同一路径的内容不会变，可以放心缓存
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("ascii")
+
+
+# ==========================================
+# 5. 界面层 (功能增强版)
+# ==========================================
+# 下面这些表所有会话共用、只读：以前每个 main(page) 都重建一份，网页版开几千个会话时就是几千份
+# 🎨 配色方案
+THEME = MappingProxyType({
+    "bg": "#FFCCCC",
+    "fg": "#D24D57",
+    "comp_bg": "#FFF0E6",
+    "green": "#4CAF50",
+    "white": "#FFFFFF",
+    "red": "#FF5252",
+    "card_bg": "#FFFFFF",
+    "orange": "#FF9800",
+    "ring_bg": "#FFEEEE"
+})
+
+EMOJIS = MappingProxyType({
+    "idle": ("( =ω=)..zzZ", "(=^･ω･^=)", "ฅ(ﾐ・ﻌ・ﾐ)ฅ", "( -ω-)", "₍ ᐢ. ̫ .ᐢ ₎"),
+    "work": ("( * >ω<)p", "q(>ω< * )", "φ(．．;)", "(ง •̀_•́)ง", "(=`ω´=)"),
+    "break": ("( ~ o ~ )~", "旦_(^O^ )", "(=^ ◡ ^=)", "☕(・ω・)", "🧴(舔毛中)"),
+    "happy": ("(≧◡≦) ♡", "(=^･^=)♪", "(/ =ω=)/", "o(>ω<)o", "⸜( ˙˘˙)⸝"),
+    "touch": ("(///ω///)", "(=ﾟωﾟ)ﾉ", "(/ω＼)", "Meow~"),
+})
+
+PRIORITY_COLORS = MappingProxyType({"red": THEME["red"], "orange": THEME["orange"], "green": THEME["green"]})
+HEAT_COLORS = ("#F2E6E6", "#F7C1C4", "#EE8E94", "#E06870", THEME["fg"])  # 0 条鱼 -> 最多
+WEEKDAY_NAMES = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+TIMER_STAGE_NAMES = MappingProxyType({"detect": "发现到点", "hop": "排队进界面", "ui": "界面刷完", "total": "合计"})
+
+
 def main(page: ft.Page):
+    trace = StartupTrace("main")
+    page.session.set("startup_trace", trace)
     page.window_width = 390
     page.window_height = 844
     page.title = "猫猫专注助手"
     page.theme_mode = ft.ThemeMode.LIGHT
 
-    # 🎨 配色方案
-    THEME = {
-        "bg": "#FFCCCC",
-        "fg": "#D24D57",
-        "comp_bg": "#FFF0E6",
-        "green": "#4CAF50",
-        "white": "#FFFFFF",
-        "red": "#FF5252",
-        "card_bg": "#FFFFFF",
-        "orange": "#FF9800",
-        "ring_bg": "#FFEEEE"
-    }
     page.bgcolor = THEME["bg"]
     page.padding = 0
     # 🌟 屏幕常亮
     page.keep_screen_on = True
 
-    logic = StudyLogic()
+    # 有首页快照就先用快照画首页，完整数据在首帧之后后台加载(见 warm_up)
+    with trace.phase("StudyLogic snapshot"):
+        logic = StudyLogic(defer_load=True)
+    ui = UpdateBatcher(page)
+    # 界面事件处理函数都套上它：耗时按这个会话的数据量分档(见 diagnostics.HandlerTracer)
+    traced = instrumented(sizes=logic.data_sizes)
+    # 首帧耗时、切页次数/耗时，调试和基准测试时从 page.session 里取
+    ui_stats = {"first_frame_ms": None, "switches": 0, "last_switch_ms": None, "views_built": 1}
+    page.session.set("ui_stats", ui_stats)
+    page.session.set("ui_batcher", ui)
+    session_closed = threading.Event()
     timer_running = False
     is_break_mode = False
     end_timestamp = 0
     total_duration = logic.data["focus_min"] * 60
+    # 每次开始/暂停/结束都换一代：旧的计时线程和排着队的 finish_cycle 发现代数不对就作废，
+    # 快速暂停再继续时不会有两个线程一起走、也不会一轮算两只番茄
+    timer_generation = 0
+    paused_remaining = None  # 暂停时精确的剩余秒数(显示的是取整后的)
 
     # 🎵 BGM 状态
     bgm_ui_enabled = True  # UI上显示的开关状态
 
-    # 🎵 播放列表
-    bgm_playlist = [
-        # 把文件名改成你的 kanong.mp3
-        {"name": "卡农", "src": "assets/kanong.mp3"},
-
-
-    ]
+    # 🎵 播放列表：资源目录里除铃声/静音之外的音频，自动扫描(带缓存)，不用改代码
+    asset_manifest = get_asset_manifest()
+    bgm_playlist = bgm_playlist_from_manifest(asset_manifest)
     current_bgm_index = 0
     # 【关键】静音文件路径，必须存在
-    SILENCE_SRC = "assets/silence.mp3"
-
-    emojis = {
-        "idle": ["( =ω=)..zzZ", "(=^･ω･^=)", "ฅ(ﾐ・ﻌ・ﾐ)ฅ", "( -ω-)", "₍ ᐢ. ̫ .ᐢ ₎"],
-        "work": ["( * >ω<)p", "q(>ω< * )", "φ(．．;)", "(ง •̀_•́)ง", "(=`ω´=)"],
-        "break": ["( ~ o ~ )~", "旦_(^O^ )", "(=^ ◡ ^=)", "☕(・ω・)", "🧴(舔毛中)"],
-        "happy": ["(≧◡≦) ♡", "(=^･^=)♪", "(/ =ω=)/", "o(>ω<)o", "⸜( ˙˘˙)⸝"],
-        "touch": ["(///ω///)", "(=ﾟωﾟ)ﾉ", "(/ω＼)", "Meow~"]
-    }
-
-    # 🔊 音频初始化
-    audio_alarm = flet_audio.Audio(src="assets/alarm.mp3", autoplay=False)
-    # 默认加载第一首
-    audio_bg = flet_audio.Audio(src=bgm_playlist[0]["src"], autoplay=False, release_mode="loop")
-
-    page.overlay.append(audio_alarm)
-    page.overlay.append(audio_bg)
+    SILENCE_SRC = f"{asset_manifest['assets_dir']}/silent.mp3"
+
+
+    # 🔊 音频在首帧之后才初始化(见 setup_audio)，在那之前两者都是 None
+    audio_alarm = None
+    bgm_pool = None
+
+    def setup_audio():
+        nonlocal audio_alarm, bgm_pool
+        flet_audio = optional_import("flet_audio")
+        if flet_audio is None:
+            return  # 没有音频插件：静音运行
+        audio_alarm = flet_audio.Audio(src="assets/alarm.mp3", autoplay=False)
+        # 只预加载静音轨、当前这首和下一首，切歌时再轮换
+        upcoming = [bgm_playlist[(current_bgm_index + i) % len(bgm_playlist)]["src"]
+                    for i in range(min(len(bgm_playlist), AudioChannelPool.MUSIC_CHANNELS))]
+        bgm_pool = AudioChannelPool(flet_audio, ui, SILENCE_SRC, upcoming)
+        with ui.lock:  # 首帧已经发出去了，整页刷新可能正在遍历 overlay
+            page.overlay.append(audio_alarm)
+            page.overlay.extend(bgm_pool.controls())
+        page.session.set("bgm_pool", bgm_pool)
+        ui.request()
 
     # ---------------------------------------------------
     # 🌙 伪黑屏组件 (保活+省电核心)
@@ -263,13 +1539,13 @@ def main(page: ft.Page):
         if enable:
             if not timer_running:
                 page.snack_bar = ft.SnackBar(ft.Text("先开始专注再熄屏喵~"), open=True)
-                page.update()
+                ui.request()
                 return
             dim_overlay.visible = True
             page.snack_bar = ft.SnackBar(ft.Text("🌙 已进入伪黑屏，请勿按电源键！"), open=True)
         else:
             dim_overlay.visible = False
-        page.update()
+        ui.flush_now()
 
     # ---------------------------------------------------
     # 音频控制逻辑 (修改版)
@@ -277,32 +1553,35 @@ def main(page: ft.Page):
 
     def update_bgm_playback():
         """根据当前状态决定播放什么（音乐还是静音）"""
-        audio_bg.pause()
-        if bgm_ui_enabled:
-            # 正常播放音乐
-            audio_bg.src = bgm_playlist[current_bgm_index]["src"]
+        if bgm_pool is None:
+            return
+        preload = None
+        if bgm_ui_enabled and bgm_playlist:
+            # 正常播放音乐，顺便预加载下一首
+            src = bgm_playlist[current_bgm_index]["src"]
+            preload = bgm_playlist[(current_bgm_index + 1) % len(bgm_playlist)]["src"]
         else:
             # 播放静音文件 (保活关键)
-            audio_bg.src = SILENCE_SRC
-
-        audio_bg.update()
+            src = SILENCE_SRC
         # 只有在计时状态下，才真正开始 "Play"
-        if timer_running:
-            audio_bg.play()
+        bgm_pool.select(src, play=timer_running, preload=preload)
 
     def trigger_vibration():
+        plyer = optional_import("plyer")
         try:
-            vibrator.vibrate(2)
+            plyer.vibrator.vibrate(2)
         except:
             pass
 
     def send_notification(title, message):
+        plyer = optional_import("plyer")
         try:
-            notification.notify(title=title, message=message, app_name="猫猫专注", timeout=10)
+            plyer.notification.notify(title=title, message=message, app_name="猫猫专注", timeout=10)
         except:
             pass
 
     # 🎵 切换 BGM 开关
+    @traced
     def toggle_bgm(e):
         nonlocal bgm_ui_enabled
         bgm_ui_enabled = not bgm_ui_enabled
@@ -314,17 +1593,21 @@ def main(page: ft.Page):
             btn_bgm.icon = ft.Icons.MUSIC_OFF
             btn_bgm.tooltip = "白噪音: 关闭 (静音保活中)"
 
-        btn_bgm.update()
+        ui.request(btn_bgm)
         # 更新播放源
         update_bgm_playback()
-        page.update()
 
     # 🎵 切歌
+    @traced
     def next_bgm(e):
         nonlocal current_bgm_index
         if not bgm_ui_enabled:
             page.snack_bar = ft.SnackBar(ft.Text("先打开音乐喵~"), open=True)
-            page.update()
+            ui.request()
+            return
+        if not bgm_playlist:
+            page.snack_bar = ft.SnackBar(ft.Text("资源目录里没有找到背景音乐喵~"), open=True)
+            ui.request()
             return
 
         current_bgm_index = (current_bgm_index + 1) % len(bgm_playlist)
@@ -333,27 +1616,31 @@ def main(page: ft.Page):
         update_bgm_playback()
 
         page.snack_bar = ft.SnackBar(ft.Text(f"🎵 切换至: {new_song['name']} 🐾"), open=True)
-        page.update()
+        ui.request()
 
     # 🔔 结束逻辑
-    def finish_cycle():
-        nonlocal timer_running, is_break_mode, total_duration
+    @traced
+    def finish_cycle(planned_end=None, detected_at=None):
+        nonlocal timer_running, is_break_mode, total_duration, timer_generation, paused_remaining
+        started_at = time.time()
+        timer_generation += 1
+        paused_remaining = None
+        was_break = is_break_mode
 
         # 唤醒屏幕
         if dim_overlay.visible:
             dim_overlay.visible = False
-            page.update()
+            ui.request(dim_overlay)
 
         # 停止 BGM
         try:
-            audio_bg.pause()
+            bgm_pool.pause()
         except:
             pass
 
         # 播放铃声
         try:
             audio_alarm.seek(0)
-            page.update()
             audio_alarm.play()
         except:
             pass
@@ -363,6 +1650,7 @@ def main(page: ft.Page):
         if not is_break_mode:
             logic.increment_tomato()
             txt_tomato_stats.value = f"今日渔获: {get_tomato_str()}"
+            refresh_weekly_report()
             is_break_mode = True
             next_min = logic.data["break_min"]
             total_duration = next_min * 60
@@ -373,7 +1661,7 @@ def main(page: ft.Page):
             btn_start.bgcolor = THEME["green"]
             btn_start.color = "white"
             btn_skip.visible = True
-            txt_cat.value = random.choice(emojis["break"])
+            txt_cat.value = random.choice(EMOJIS["break"])
             msg = "喵！捕猎完成！该休息啦 (呼噜呼噜~)"
             page.snack_bar = ft.SnackBar(ft.Text(msg), open=True)
             send_notification("专注完成", msg)
@@ -388,7 +1676,7 @@ def main(page: ft.Page):
             btn_start.bgcolor = THEME["white"]
             btn_start.color = THEME["fg"]
             btn_skip.visible = False
-            txt_cat.value = random.choice(emojis["idle"])
+            txt_cat.value = random.choice(EMOJIS["idle"])
             msg = "睡醒了，准备继续抓鱼！"
             page.snack_bar = ft.SnackBar(ft.Text(msg), open=True)
             send_notification("休息结束", msg)
@@ -396,22 +1684,25 @@ def main(page: ft.Page):
         txt_timer.value = f"{next_min:02}:00"
         ring_timer.value = 1.0
         timer_running = False
-        page.update()
+        ui.flush_now()
+        if planned_end is not None:
+            timer_drift.record("break" if was_break else "focus", planned_end, detected_at, started_at, time.time())
 
+    @traced
     def handle_lifecycle_change(e):
         if timer_running:
             nonlocal end_timestamp
             now = time.time()
-            remaining = int(end_timestamp - now)
+            remaining = math.ceil(end_timestamp - now)
             if e.data == "resumed" and remaining <= 0:
-                finish_cycle()
+                finish_cycle(end_timestamp, now)
                 return
             if remaining < 0: remaining = 0
             txt_timer.value = f"{remaining // 60:02}:{remaining % 60:02}"
             if total_duration > 0:
                 progress = remaining / total_duration
                 ring_timer.value = progress
-            page.update()
+            ui.request(txt_timer, ring_timer)
 
     page.on_app_lifecycle_state_change = handle_lifecycle_change
 
@@ -424,7 +1715,7 @@ def main(page: ft.Page):
         )
 
     # ------------------ UI 组件 ------------------
-    txt_weather = ft.Text(value="正在召唤气象喵...", size=11, color=THEME["fg"])
+    txt_weather = ft.Text(value=logic.weather or "正在召唤气象喵...", size=11, color=THEME["fg"])
     weather_icon = ft.Icon(name=ft.Icons.PETS, size=14, color=THEME["fg"])
 
     weather_pill = ft.Container(
@@ -438,12 +1729,14 @@ def main(page: ft.Page):
     )
 
     def weather_loop_thread():
-        while True:
+        # 会话断开后就退出；以前一直 sleep 下去，网页版每开过一个会话就永远多一个线程
+        while not session_closed.is_set():
             w_str = logic.fetch_weather()
+            logic.set_weather(w_str)
             txt_weather.value = w_str
             weather_icon.name = random.choice([ft.Icons.PETS, ft.Icons.CLOUD_QUEUE, ft.Icons.WB_SUNNY])
-            page.update()
-            time.sleep(300)
+            ui.request(txt_weather, weather_icon)
+            session_closed.wait(300)
 
     btn_checkin = ft.ElevatedButton(
         text="📅 按爪",
@@ -509,14 +1802,15 @@ def main(page: ft.Page):
             btn_checkin.text = "🐾 按爪签到"
             btn_checkin.bgcolor = THEME["white"]
             btn_checkin.color = THEME["fg"]
-        page.update()
+        ui.request(btn_checkin)
 
+    @traced
     def checkin_click(e):
         success, msg = logic.check_in()
         refresh_checkin_ui()
-        if success: txt_cat.value = random.choice(emojis["happy"])
+        if success: txt_cat.value = random.choice(EMOJIS["happy"])
         page.snack_bar = ft.SnackBar(ft.Text(msg), open=True)
-        page.update()
+        ui.request()
 
     btn_checkin.on_click = checkin_click
     refresh_checkin_ui()
@@ -525,11 +1819,22 @@ def main(page: ft.Page):
     txt_days_num = ft.Text(f"{logic.get_main_days_left()}", size=36, weight="bold", color=THEME["fg"],
                            font_family="Impact")
     txt_days_unit = ft.Text("个罐头", size=12, color=THEME["fg"], weight="bold", offset=ft.Offset(0, 0.6))
+    txt_next_event = ft.Text("", size=11, color="grey", visible=False)
+
+    def refresh_next_event():
+        """卡片底部的"下一个猎物"：鱼干清单里最近的一个没过期的倒计时，变了才推送"""
+        event = logic.next_countdown()
+        value = f"下一个猎物: {event.title} · {logic.countdown_days_left(event.id)} 天" if event else ""
+        if txt_next_event.value != value:
+            txt_next_event.value = value
+            txt_next_event.visible = bool(value)
+            ui.request(txt_next_event)
 
     countdown_card = ft.Container(
         content=ft.Column([
             txt_days_label,
-            ft.Row([txt_days_num, txt_days_unit], alignment="center", vertical_alignment="end")
+            ft.Row([txt_days_num, txt_days_unit], alignment="center", vertical_alignment="end"),
+            txt_next_event
         ], horizontal_alignment="center", spacing=0),
         bgcolor=THEME["white"],
         padding=ft.padding.symmetric(horizontal=20, vertical=10),
@@ -539,7 +1844,7 @@ def main(page: ft.Page):
     )
 
     txt_timer_title = ft.Text("准备捕猎", size=16, weight="bold", color=THEME["fg"])
-    txt_cat = ft.Text(random.choice(emojis["idle"]), size=18, color=THEME["fg"])
+    txt_cat = ft.Text(random.choice(EMOJIS["idle"]), size=18, color=THEME["fg"])
     txt_timer = ft.Text(f"{logic.data['focus_min']}:00", size=50, weight="bold", color=THEME["fg"],
                         font_family="Impact")
 
@@ -587,6 +1892,7 @@ def main(page: ft.Page):
         )
     )
 
+    @traced
     def skip_break_e(e):
         nonlocal timer_running, is_break_mode, total_duration
         timer_running = False
@@ -601,13 +1907,13 @@ def main(page: ft.Page):
         btn_start.text = "开始捕猎"
         btn_start.bgcolor = THEME["white"]
         btn_skip.visible = False
-        txt_cat.value = random.choice(emojis["idle"])
+        txt_cat.value = random.choice(EMOJIS["idle"])
         try:
-            audio_bg.pause()
+            bgm_pool.pause()
         except:
             pass
         page.snack_bar = ft.SnackBar(ft.Text("休息结束，准备出击！"), open=True)
-        page.update()
+        ui.flush_now()
 
     btn_skip = ft.ElevatedButton(
         text="不舔毛了", width=130, height=45, visible=False, on_click=skip_break_e,
@@ -622,27 +1928,108 @@ def main(page: ft.Page):
         return t
 
     txt_tomato_stats = ft.Text(f"今日渔获: {get_tomato_str()}", color=THEME["fg"], size=13)
+    txt_urgent = ft.Text("", size=12, color=THEME["fg"], text_align="center", visible=False)
+
+    def refresh_urgent_ui():
+        # 首页只展示最急的几条，直接从红/橙桶里取，不用排序
+        urgent = logic.top_urgent_tasks(2)
+        txt_urgent.value = "🔥 最急: " + " / ".join(t.text for t in urgent) if urgent else ""
+        txt_urgent.visible = bool(urgent)
+        ui.request(txt_urgent)
+
+    refresh_urgent_ui()
     txt_slogan = ft.Text(logic.get_random_quote(), italic=True, text_align="center", color=THEME["fg"], size=11,
                          opacity=0.8)
 
+    pet_state = {"reset": None}
+
+    def reset_cat_color():
+        txt_cat.color = THEME["fg"]
+        ui.request(txt_cat)
+
+    @traced
     def pet_the_cat(e):
-        txt_cat.value = random.choice(emojis["touch"])
+        txt_cat.value = random.choice(EMOJIS["touch"])
         txt_cat.color = THEME["orange"]
-        txt_cat.update()
-        trigger_vibration()
         page.snack_bar = ft.SnackBar(ft.Text("喵！(蹭蹭)"), open=True, duration=1000)
-        page.update()
-        time.sleep(0.5)
-        txt_cat.color = THEME["fg"]
-        txt_cat.update()
+        ui.flush_now()
+        trigger_vibration()
+        # 半秒后变回原色；交给定时器，处理函数马上返回(连着摸就从最后一下重新计时)
+        if pet_state["reset"] is not None:
+            pet_state["reset"].cancel()
+        pet_state["reset"] = threading.Timer(0.5, reset_cat_color)
+        pet_state["reset"].daemon = True
+        pet_state["reset"].start()
 
     stack_timer_display.controls[2].on_click = pet_the_cat
 
+    share_state = {"path": None, "picker": None, "dlg": None}
+
+    def on_poster_saved(e):
+        if e.path and share_state["path"]:
+            try:
+                shutil.copyfile(share_state["path"], e.path)
+                page.snack_bar = ft.SnackBar(ft.Text("海报叼回窝里啦 🐾"), open=True)
+            except OSError:
+                page.snack_bar = ft.SnackBar(ft.Text("喵？存不进去..."), open=True)
+            ui.request()
+
+    @traced
+    def save_poster_e(e):
+        # 桌面版弹系统的保存对话框，直接写到用户选的路径；网页版的路径在用户浏览器那边，服务器写不到，
+        # 改成在新标签页打开海报的 URL，让浏览器去存、去分享
+        if page.web:
+            try:
+                url = publish_poster(share_state["path"])
+            except OSError:
+                url = None
+            if url:
+                page.launch_url(url)
+                page.snack_bar = ft.SnackBar(ft.Text("海报在新标签页打开啦，右键或长按就能存喵 🐾"), open=True)
+            else:
+                page.snack_bar = ft.SnackBar(ft.Text("喵？网页版存不了，截图分享吧..."), open=True)
+            ui.request()
+            return
+        if share_state["picker"] is None:
+            share_state["picker"] = ft.FilePicker(on_result=on_poster_saved)
+            with ui.lock:
+                page.overlay.append(share_state["picker"])
+            ui.flush_now()
+        share_state["picker"].save_file(dialog_title="保存海报", file_name=os.path.basename(share_state["path"]),
+                                        allowed_extensions=["png"])
+
+    @traced
     def open_share_card(e):
         today_date = datetime.now().strftime("%Y年%m月%d日")
-        weekday = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"][datetime.now().weekday()]
+        weekday = WEEKDAY_NAMES[datetime.now().weekday()]
         tomato_count = logic.data["tomatoes"]
         focus_minutes = tomato_count * logic.data["focus_min"]
+        # 表情跟着番茄数走而不是每次随机，同一份战绩才能命中海报缓存
+        emoji = EMOJIS["happy"][tomato_count % len(EMOJIS["happy"])]
+        poster = {"date": today_date, "weekday": weekday, "tomatoes": tomato_count, "minutes": focus_minutes,
+                  "emoji": emoji, "quote": txt_slogan.value, "brand": "猫猫专注助手",
+                  "fg": THEME["fg"], "bg": THEME["card_bg"]}
+        try:
+            share_state["path"] = render_share_poster(poster)
+        except Exception:
+            share_state["path"] = None
+        if share_state["path"]:
+            # 同一张图就把上次的对话框再打开，不用重发一遍图片
+            if share_state["dlg"] is None or share_state["dlg"].data != share_state["path"]:
+                dlg_share = ft.AlertDialog(content=ft.Column([
+                    ft.Image(src_base64=poster_base64(share_state["path"]), width=300, height=450, border_radius=20),
+                    ft.Container(height=10),
+                    ft.Row([ft.IconButton(icon="download", icon_color="white", tooltip="保存海报",
+                                          on_click=save_poster_e),
+                            ft.IconButton(icon="close", icon_color="white",
+                                          on_click=lambda e: ui.close_dialog(dlg_share))],
+                           alignment="center")], tight=True, horizontal_alignment="center"),
+                    bgcolor="transparent", modal=True, data=share_state["path"])
+                share_state["dlg"] = dlg_share
+            ui.open_dialog(share_state["dlg"])
+            return
+
+        # 没有 Pillow 或中文字体时，退回用控件拼的海报，让用户自己截图
         poster_content = ft.Container(bgcolor=THEME["card_bg"], padding=30, border_radius=20, width=300, height=450,
                                       border=ft.border.all(4, THEME["fg"]), content=ft.Column([
                 ft.Row([ft.Text(f"{today_date} {weekday}", color="grey", size=14)], alignment="center"),
@@ -650,7 +2037,7 @@ def main(page: ft.Page):
                 ft.Text("今日战绩", size=16, color=THEME["fg"]),
                 ft.Text(f"{tomato_count}", size=80, weight="bold", color=THEME["fg"], font_family="Impact"),
                 ft.Text(f"条小鱼干 ({focus_minutes}分钟)", size=14, color="grey"),
-                ft.Container(height=20), ft.Text(random.choice(emojis["happy"]), size=40, color=THEME["fg"]),
+                ft.Container(height=20), ft.Text(emoji, size=40, color=THEME["fg"]),
                 ft.Container(height=20), ft.Container(
                     content=ft.Text(txt_slogan.value, italic=True, text_align="center", color=THEME["fg"], size=14),
                     padding=10),
@@ -662,10 +2049,10 @@ def main(page: ft.Page):
                                                       ft.Text("✨ 截图炫耀一下战绩 ✨", color="white", size=12,
                                                               text_align="center"),
                                                       ft.IconButton(icon="close", icon_color="white",
-                                                                    on_click=lambda e: page.close(dlg_share))],
+                                                                    on_click=lambda e: ui.close_dialog(dlg_share))],
                                                      tight=True, horizontal_alignment="center"), bgcolor="transparent",
                                    modal=True)
-        page.open(dlg_share)
+        ui.open_dialog(dlg_share)
 
     btn_share = ft.IconButton(icon="share", icon_color=THEME["fg"], tooltip="生成海报", on_click=open_share_card)
 
@@ -673,33 +2060,41 @@ def main(page: ft.Page):
         if seconds < 0: seconds = 0
         return f"{seconds // 60:02}:{seconds % 60:02}"
 
-    def timer_loop():
-        nonlocal timer_running, is_break_mode, end_timestamp, total_duration
-        while timer_running:
+    def timer_loop(generation):
+        while timer_running and generation == timer_generation:
             now = time.time()
-            remaining = int(end_timestamp - now)
-            if remaining <= 0:
+            left = end_timestamp - now
+            if left <= 0:
                 # 线程安全调用 finish_cycle
-                page.run_task(finish_cycle_wrapper)
+                page.run_task(finish_cycle_wrapper, generation, end_timestamp, now)
                 break
+            # 显示向上取整：25:00 要整整走满一秒才变 24:59，到 00:00 时正好到点
+            remaining = math.ceil(left)
             txt_timer.value = format_time(remaining)
             if total_duration > 0:
-                ratio = remaining / total_duration
+                ratio = left / total_duration
                 if ratio < 0: ratio = 0
                 if ratio > 1: ratio = 1
                 ring_timer.value = ratio
-            page.update()
-            time.sleep(0.1)
-
-    async def finish_cycle_wrapper():
-        finish_cycle()
-
+            ui.request(txt_timer, ring_timer)
+            # 最后不到 0.1 秒时只睡到点为止，免得多等一个轮询周期
+            step = min(0.1, left)
+            wake_at = time.perf_counter() + step
+            time.sleep(step)
+            M_TIMER_JITTER.observe(max(0.0, time.perf_counter() - wake_at))
+
+    async def finish_cycle_wrapper(generation, planned_end, detected_at):
+        if generation == timer_generation and timer_running:
+            finish_cycle(planned_end, detected_at)
+
+    @traced
     def toggle_timer(e):
-        nonlocal timer_running, end_timestamp, total_duration
+        nonlocal timer_running, end_timestamp, total_duration, timer_generation, paused_remaining
+        timer_generation += 1
         if not timer_running:
             timer_running = True
             btn_start.text = "爪下留情(暂停)"
-            txt_cat.value = random.choice(emojis["work"])
+            txt_cat.value = random.choice(EMOJIS["work"])
 
             # 启动时，无论有声无声，都开始播放音频以保活
             update_bgm_playback()
@@ -711,6 +2106,10 @@ def main(page: ft.Page):
                 current_secs = mins * 60 + secs
             except:
                 current_secs = logic.data["focus_min"] * 60
+            # 显示没被改过的话，按暂停时的精确剩余时间继续
+            if paused_remaining is not None and math.ceil(paused_remaining) == current_secs:
+                current_secs = paused_remaining
+            paused_remaining = None
 
             if not is_break_mode and current_secs == logic.data["focus_min"] * 60:
                 total_duration = current_secs
@@ -718,20 +2117,22 @@ def main(page: ft.Page):
                 total_duration = current_secs
 
             end_timestamp = time.time() + current_secs
-            threading.Thread(target=timer_loop, daemon=True).start()
+            threading.Thread(target=timer_loop, args=(timer_generation,), daemon=True).start()
         else:
             timer_running = False
+            paused_remaining = max(0.0, end_timestamp - time.time())
             btn_start.text = "继续捕猎"
-            txt_cat.value = random.choice(emojis["idle"])
+            txt_cat.value = random.choice(EMOJIS["idle"])
             try:
-                audio_bg.pause()
+                bgm_pool.pause()
             except:
                 pass
 
-        page.update()
+        ui.flush_now()
 
     btn_start.on_click = toggle_timer
 
+    trace.mark("home controls built")
     view_home = ft.Container(
         padding=ft.padding.only(left=20, right=20, top=10, bottom=160),
         content=ft.Column([
@@ -744,6 +2145,7 @@ def main(page: ft.Page):
             music_bar,  # 🎵 音乐条 (包含月亮按钮)
             ft.Container(height=10),
             countdown_card,
+            txt_urgent,
             ft.Container(height=20),
             stack_timer_display,
             ft.Container(height=20),
@@ -763,244 +2165,80 @@ def main(page: ft.Page):
         ], horizontal_alignment="center", scroll="auto")
     )
 
+    HISTORY_PAGE = 50  # 日记每次翻出来的条数
+    history_state = {"dlg": None, "matches": [], "shown": 0}
+
+    def history_row(entry):
+        return ft.Text(entry, size=12, selectable=True)
+
+    def load_history_page():
+        st = history_state
+        lv = st["dlg"].content.content.controls[1]
+        rows = [history_row(entry) for entry in logic.history_page(st["matches"], st["shown"], HISTORY_PAGE)]
+        with ui.lock:
+            lv.controls.extend(rows)
+        st["shown"] += len(rows)
+        return lv
+
+    def run_history_search(query):
+        st = history_state
+        st["matches"] = logic.search_history(query)
+        st["shown"] = 0
+        lv = st["dlg"].content.content.controls[1]
+        with ui.lock:
+            lv.controls.clear()
+            load_history_page()
+            if not lv.controls:
+                lv.controls.append(ft.Text("翻遍了也没找到..." if query.strip() else "日记本被老鼠偷走了(空的)...",
+                                           size=12, color="grey"))
+        ui.request(lv)
+
+    @traced
+    def on_history_scroll(e):
+        # 快滑到底时再翻一页
+        st = history_state
+        if st["shown"] < len(st["matches"]) and e.pixels >= e.max_scroll_extent - 100:
+            ui.request(load_history_page())
+
+    @traced
     def show_history_e(e):
-        hist_text = "\n".join(reversed(logic.data["history"][-20:]))
-        if not hist_text: hist_text = "日记本被老鼠偷走了(空的)..."
-        dlg = ft.AlertDialog(title=ft.Text("猫猫日记 🐾"),
-                             content=ft.Container(content=ft.Text(hist_text, size=12, selectable=True), height=300,
-                                                  width=300),
-                             actions=[ft.TextButton("关上日记", on_click=lambda e: page.close(dlg))],
-                             bgcolor=THEME["comp_bg"])
-        page.open(dlg)
-
-    lv_events = ft.Column(spacing=10)
-
-    def render_events():
-        lv_events.controls.clear()
-        if not logic.data.get("countdowns"): return
-        for i, item in enumerate(logic.data["countdowns"]):
-            title = item["title"]
-            date_str = item["date"]
-            days = logic.calculate_days(date_str)
-            day_color = THEME["red"] if days < 0 else THEME["fg"]
-            day_text = f"{days} 天" if days >= 0 else f"过期 {-days} 天"
-            card = ft.Container(
-                bgcolor=THEME["white"],
-                padding=15,
-                border_radius=10,
-                shadow=ft.BoxShadow(blur_radius=5, color="#0D000000"),
-                content=ft.Row([
-                    ft.Column([ft.Text(title, size=16, weight="bold", color=THEME["fg"]),
-                               ft.Text(date_str, size=12, color="grey")], expand=True),
-                    ft.Column([ft.Text("剩余", size=10, color="grey"),
-                               ft.Text(day_text, size=20, weight="bold", color=day_color)],
-                              horizontal_alignment="center"),
-                    ft.IconButton(icon="close", icon_size=18, icon_color="grey",
-                                  on_click=lambda e, idx=i: delete_event(idx))
-                ], alignment="space_between")
-            )
-            lv_events.controls.append(card)
-        page.update()
-
-    def delete_event(index):
-        logic.remove_countdown_event(index);
-        render_events()
-
-    dlg_event_title = ft.TextField(label="猎物名称(目标)", color=THEME["fg"])
-    dlg_event_date = ft.TextField(label="狩猎日期 (YYYY-MM-DD)", color=THEME["fg"])
-
-    def save_new_event(e):
-        if logic.add_countdown_event(dlg_event_title.value, dlg_event_date.value):
-            page.close(dlg_add_event);
-            render_events();
-            dlg_event_title.value = "";
-            dlg_event_date.value = "";
-            page.snack_bar = ft.SnackBar(ft.Text("喵！新目标锁定！"), open=True)
-        else:
-            page.snack_bar = ft.SnackBar(ft.Text("日期写错啦(挠头)"), open=True)
-        page.update()
-
-    dlg_add_event = ft.AlertDialog(title=ft.Text("添加倒计时"),
-                                   content=ft.Column([dlg_event_title, dlg_event_date], height=150),
-                                   actions=[ft.TextButton("取消", on_click=lambda e: page.close(dlg_add_event)),
-                                            ft.TextButton("锁定目标", on_click=save_new_event)],
-                                   bgcolor=THEME["comp_bg"])
-
-    def open_add_event_dialog(e):
-        if not dlg_event_date.value: dlg_event_date.value = datetime.now().strftime("%Y-%m-%d")
-        page.open(dlg_add_event)
-
-    priority_map = {"red": THEME["red"], "orange": THEME["orange"], "green": THEME["green"]}
-    current_priority = "green"
-
-    def set_priority(color):
-        nonlocal current_priority
-        current_priority = color
-        for btn in priority_btns.controls:
-            btn.icon = ft.Icons.CIRCLE_OUTLINED
-            if btn.data == color:
-                btn.icon = ft.Icons.CIRCLE
-        page.update()
-
-    priority_btns = ft.Row([
-        ft.IconButton(icon=ft.Icons.CIRCLE_OUTLINED, icon_color=THEME["red"], data="red", tooltip="紧急",
-                      on_click=lambda e: set_priority("red")),
-        ft.IconButton(icon=ft.Icons.CIRCLE_OUTLINED, icon_color=THEME["orange"], data="orange", tooltip="重要",
-                      on_click=lambda e: set_priority("orange")),
-        ft.IconButton(icon=ft.Icons.CIRCLE, icon_color=THEME["green"], data="green", tooltip="日常",
-                      on_click=lambda e: set_priority("green"))
-    ], spacing=0)
-
-    lv_tasks = ft.ListView(expand=True, spacing=5)
-    txt_input_task = ft.TextField(
-        hint_text="输入待办...",
-        expand=True,
-        bgcolor=THEME["white"],
-        color=THEME["fg"],
-        border_radius=10,
-        border_color="transparent",
-        text_size=14,
-        content_padding=15
-    )
-
-    empty_state = ft.Container(content=ft.Column(
-        [ft.Text("( =ω=)..zzZ", size=40, color="grey"), ft.Text("暂无任务，去晒太阳吧~ ☀️", color="grey")],
-        horizontal_alignment="center", alignment=ft.MainAxisAlignment.CENTER), alignment=ft.alignment.center,
-        padding=40)
-
-    def render_tasks():
-        lv_tasks.controls.clear()
-        if not logic.data["tasks"]:
-            lv_tasks.controls.append(empty_state)
-        else:
-            for i, task_item in enumerate(logic.data["tasks"]):
-                if isinstance(task_item, dict):
-                    text = task_item["text"]
-                    prio = task_item.get("priority", "green")
-                else:
-                    text = task_item
-                    prio = "green"
-
-                p_icon = ft.Icon(ft.Icons.CIRCLE, size=12, color=priority_map.get(prio, THEME["green"]))
-                display_content = [p_icon, ft.Text(text, size=14, color=THEME["fg"], expand=True)]
-                if prio == "red":
-                    display_content.insert(1, ft.Text("🔥", size=12))
-
-                lv_tasks.controls.append(
-                    ft.Container(
-                        bgcolor=THEME["comp_bg"],
-                        padding=12,
-                        border_radius=8,
-                        content=ft.Row([
-                            ft.Row(display_content, expand=True, spacing=10),
-                            ft.IconButton(icon="delete_outline", icon_color=THEME["fg"], icon_size=20,
-                                          on_click=lambda e, idx=i: delete_task(idx))
-                        ])
-                    )
-                )
-        page.update()
-
-    def add_task_e(e):
-        if txt_input_task.value:
-            logic.add_task(txt_input_task.value, current_priority)
-            txt_input_task.value = ""
-            render_tasks()
-
-    def delete_task(idx):
-        logic.remove_task(idx);
-        render_tasks()
-
-    render_events();
-    render_tasks()
-
-    view_todo = ft.Container(
-        padding=ft.padding.only(left=20, right=20, top=20, bottom=160),
-        content=ft.Column([
-            ft.Row([
-                ft.Text("鱼干清单 🐟", size=24, weight="bold", color=THEME["fg"]),
-                ft.Row([
-                    ft.IconButton(icon="history", icon_color=THEME["fg"], tooltip="查看历史", on_click=show_history_e),
-                    ft.IconButton(icon="alarm_add", icon_color=THEME["fg"], tooltip="添加倒计时",
-                                  on_click=open_add_event_dialog)
-                ])
-            ], alignment="space_between"),
-            lv_events,
-            ft.Divider(color=THEME["fg"], thickness=1, height=30),
-            ft.Container(content=lv_tasks, expand=True, bgcolor=THEME["bg"]),
-            ft.Container(content=ft.Row([ft.Text("重要程度:", size=12, color="grey"), priority_btns], alignment="end")),
-            ft.Row(
-                [txt_input_task,
-                 ft.IconButton("add_circle", icon_color=THEME["fg"], icon_size=40, on_click=add_task_e)]),
-            get_watermark(),
-            ft.Container(height=30)
-        ]))
-
-    def create_input(label, val):
-        return ft.TextField(
-            label=label, value=val,
-            label_style=ft.TextStyle(color=THEME["fg"]),
-            color=THEME["fg"],
-            bgcolor=THEME["white"],
-            border_radius=10,
-            border_color="transparent",
-            cursor_color=THEME["fg"]
-        )
-
-    input_name = create_input("猎物名称", logic.data["target_name"])
-    input_date = create_input("狩猎日期", logic.data["target_date"])
-    input_city = create_input("地盘(城市)", logic.data.get("city", "郑州"))
-    input_focus = create_input("捕猎时长(分)", str(logic.data["focus_min"]))
-    input_break = create_input("舔毛时长(分)", str(logic.data["break_min"]))
-
-    def clear_stats_e(e):
-        logic.clear_daily_stats();
-        txt_tomato_stats.value = "今日渔获: (空空如也)";
-        page.snack_bar = ft.SnackBar(ft.Text("已清空，一切归零喵"), open=True);
-        page.update()
-
-    def save_settings(e):
-        logic.update_settings(input_name.value, input_date.value, input_city.value, input_focus.value,
-                              input_break.value)
-        txt_days_label.value = f"距离{input_name.value}还剩"
-        txt_days_num.value = f"{logic.get_main_days_left()}"
-        if not timer_running and not is_break_mode:
-            try:
-                mins = int(logic.data["focus_min"])
-            except:
-                mins = 25
-            txt_timer.value = f"{mins:02}:00"
-            nonlocal total_duration
-            total_duration = mins * 60
-            ring_timer.value = 1.0
-        txt_weather.value = "刷新中...";
-        page.snack_bar = ft.SnackBar(ft.Text("喵！设置保存成功！"), open=True);
-        page.update()
-
-    def show_weekly_report(e):
+        if history_state["dlg"] is None:
+            search = ft.TextField(hint_text="搜一搜日记...", prefix_icon="search", dense=True,
+                                  border_color=THEME["fg"], on_change=lambda e: run_history_search(e.control.value))
+            lv = ft.ListView(expand=True, spacing=2, on_scroll=on_history_scroll,
+                             on_scroll_interval=100)
+            dlg = ft.AlertDialog(title=ft.Text("猫猫日记 🐾"),
+                                 content=ft.Container(content=ft.Column([search, lv], spacing=8), height=300,
+                                                      width=300),
+                                 actions=[ft.TextButton("关上日记", on_click=lambda e: ui.close_dialog(dlg))],
+                                 bgcolor=THEME["comp_bg"])
+            history_state["dlg"] = dlg
+        dlg = history_state["dlg"]
+        # 每次打开都按当前搜索词重新取第一页，这样能看到刚写进去的日记
+        run_history_search(dlg.content.content.controls[0].value or "")
+        ui.open_dialog(dlg)
+
+    weekly_report = {"dlg": None, "rods": [], "labels": [], "chart": None}  # 周报只建一次，之后原地改
+
+    def weekly_bar(day):
+        count = day["count"]
+        return (count, THEME["fg"] if count > 0 else "grey", f"{day['full_date']}: {count}条鱼")
+
+    def build_weekly_report():
         stats = logic.get_weekly_data()
-        chart_groups = []
-        for i, day in enumerate(stats):
-            count = day["count"]
-            bar_color = THEME["fg"] if count > 0 else "grey"
-            tooltip = f"{day['full_date']}: {count}条鱼"
-            chart_groups.append(
-                ft.BarChartGroup(
-                    x=i,
-                    bar_rods=[ft.BarChartRod(from_y=0, to_y=count, width=16, color=bar_color, tooltip=tooltip,
-                                             border_radius=4)]
-                )
-            )
-
-        bottom_axis = ft.ChartAxis(
-            labels=[ft.ChartAxisLabel(value=i, label=ft.Text(d["date"], size=10, color="grey")) for i, d in
-                    enumerate(stats)]
-        )
+        rods, labels = [], []
+        for day in stats:
+            count, bar_color, tooltip = weekly_bar(day)
+            rods.append(ft.BarChartRod(from_y=0, to_y=count, width=16, color=bar_color, tooltip=tooltip,
+                                       border_radius=4))
+            labels.append(ft.Text(day["date"], size=10, color="grey"))
 
         chart = ft.BarChart(
-            bar_groups=chart_groups,
+            bar_groups=[ft.BarChartGroup(x=i, bar_rods=[rod]) for i, rod in enumerate(rods)],
             border=ft.border.all(1, "transparent"),
             left_axis=ft.ChartAxis(labels_size=0, show_labels=False),
-            bottom_axis=bottom_axis,
+            bottom_axis=ft.ChartAxis(
+                labels=[ft.ChartAxisLabel(value=i, label=label) for i, label in enumerate(labels)]),
             height=200,
             tooltip_bgcolor=THEME["comp_bg"],
             max_y=max([x["count"] for x in stats], default=5) + 2
@@ -1014,48 +2252,513 @@ def main(page: ft.Page):
             ft.Text("加油！多抓小鱼干！", size=12, color="grey", italic=True)
         ], horizontal_alignment="center")
 
-        dlg_chart = ft.AlertDialog(content=ft.Container(content=content, height=300, width=350, padding=10),
-                                   bgcolor="white")
-        page.open(dlg_chart)
+        dlg = ft.AlertDialog(content=ft.Container(content=content, height=300, width=350, padding=10),
+                             bgcolor="white")
+        weekly_report.update(rods=rods, labels=labels, chart=chart, dlg=dlg)
 
-    btn_report = ft.ElevatedButton("📊 查看狩猎周报", on_click=show_weekly_report, bgcolor=THEME["comp_bg"],
-                                   color=THEME["fg"], width=390, elevation=0)
+    def refresh_weekly_report():
+        """抓到番茄或跨天后调用：只改变了的柱子和日期标签"""
+        if weekly_report["dlg"] is None:
+            return
+        stats = logic.get_weekly_data()
+        changed = []
+        for rod, label, day in zip(weekly_report["rods"], weekly_report["labels"], stats):
+            count, bar_color, tooltip = weekly_bar(day)
+            if (rod.to_y, rod.color, rod.tooltip) != (count, bar_color, tooltip):
+                rod.to_y, rod.color, rod.tooltip = count, bar_color, tooltip
+                changed.append(rod)
+            if label.value != day["date"]:
+                label.value = day["date"]
+                changed.append(label)
+        chart = weekly_report["chart"]
+        max_y = max([x["count"] for x in stats], default=5) + 2
+        if chart.max_y != max_y:
+            chart.max_y = max_y
+            changed.append(chart)
+        # 周报关着就先不发，下次 page.open 时随那次刷新一起过去
+        if changed and weekly_report["dlg"].open:
+            ui.request(*changed)
+
+    @traced
+    def show_weekly_report(e):
+        if weekly_report["dlg"] is None:
+            build_weekly_report()
+        ui.open_dialog(weekly_report["dlg"])
+
+    event_day_texts = {}  # 事件 id -> 显示剩余天数的 Text，跨天时只改这些
+
+    def day_text_style(days):
+        if days >= 0:
+            return f"{days} 天", THEME["fg"]
+        return f"过期 {-days} 天", THEME["red"]
+
+    def refresh_event_days():
+        """跨天后重算一遍天数，只推送数字真的变了的卡片"""
+        changed = []
+        days_left = f"{logic.get_main_days_left()}"
+        if txt_days_num.value != days_left:
+            txt_days_num.value = days_left
+            changed.append(txt_days_num)
+        for event_id, txt_days in event_day_texts.items():
+            day_text, day_color = day_text_style(logic.countdown_days_left(event_id))
+            if txt_days.value != day_text:
+                txt_days.value = day_text
+                txt_days.color = day_color
+                changed.append(txt_days)
+        if changed:
+            ui.request(*changed)
+        refresh_next_event()
+
+    # ---------------- 鱼干清单页(首次切过去才构建) ----------------
+    def build_view_todo():
+        lv_events = ft.Column(spacing=10)
+
+        def build_event_card(event_id, item):
+            day_text, day_color = day_text_style(logic.countdown_days_left(event_id))
+            txt_days = ft.Text(day_text, size=20, weight="bold", color=day_color)
+            event_day_texts[event_id] = txt_days
+            return ft.Container(
+                bgcolor=THEME["white"],
+                padding=15,
+                border_radius=10,
+                shadow=ft.BoxShadow(blur_radius=5, color="#0D000000"),
+                content=ft.Row([
+                    ft.Column([ft.Text(item.title, size=16, weight="bold", color=THEME["fg"]),
+                               ft.Text(item.date, size=12, color="grey")], expand=True),
+                    ft.Column([ft.Text("剩余", size=10, color="grey"), txt_days],
+                              horizontal_alignment="center"),
+                    ft.IconButton(icon="close", icon_size=18, icon_color="grey",
+                                  on_click=lambda e, eid=event_id: delete_event(eid))
+                ], alignment="space_between")
+            )
 
-    btn_history = ft.ElevatedButton("📜 翻看日记本", on_click=show_history_e, bgcolor=THEME["white"],
-                                    color=THEME["fg"], width=390, elevation=2)
-    btn_clear = ft.TextButton("🗑️ 倒掉今日猫粮(清空数据)", on_click=clear_stats_e,
-                              style=ft.ButtonStyle(color=THEME["fg"]))
+        event_cards = KeyedList(lv_events, build_event_card, lock=ui.lock)
+
+        def render_events():
+            event_cards.sync((item.id, item) for item in logic.iter_countdowns())
+            ui.request(lv_events)
+
+        @traced
+        def delete_event(event_id):
+            if logic.remove_countdown_event(event_id):
+                changed = event_cards.remove(event_id)
+                event_day_texts.pop(event_id, None)
+                if changed is not None:
+                    ui.request(changed)
+                refresh_next_event()
+
+        dlg_event_title = ft.TextField(label="猎物名称(目标)", color=THEME["fg"])
+        dlg_event_date = ft.TextField(label="狩猎日期 (YYYY-MM-DD)", color=THEME["fg"])
+
+        @traced
+        def save_new_event(e):
+            event = logic.add_countdown_event(dlg_event_title.value, dlg_event_date.value)
+            if event:
+                ui.close_dialog(dlg_add_event);
+                changed = event_cards.insert(event.id, event, at=logic.countdown_position(event.id))
+                if changed is not None:
+                    ui.request(changed)
+                refresh_next_event()
+                dlg_event_title.value = "";
+                dlg_event_date.value = "";
+                page.snack_bar = ft.SnackBar(ft.Text("喵！新目标锁定！"), open=True)
+            else:
+                page.snack_bar = ft.SnackBar(ft.Text("日期写错啦(挠头)"), open=True)
+            ui.request()
+
+        dlg_add_event = ft.AlertDialog(title=ft.Text("添加倒计时"),
+                                       content=ft.Column([dlg_event_title, dlg_event_date], height=150),
+                                       actions=[ft.TextButton("取消", on_click=lambda e: ui.close_dialog(dlg_add_event)),
+                                                ft.TextButton("锁定目标", on_click=save_new_event)],
+                                       bgcolor=THEME["comp_bg"])
+
+        @traced
+        def open_add_event_dialog(e):
+            if not dlg_event_date.value: dlg_event_date.value = day_clock.today_str
+            ui.open_dialog(dlg_add_event)
+
+        current_priority = "green"
+
+        def set_priority(color):
+            nonlocal current_priority
+            current_priority = color
+            for btn in priority_btns.controls:
+                btn.icon = ft.Icons.CIRCLE_OUTLINED
+                if btn.data == color:
+                    btn.icon = ft.Icons.CIRCLE
+            ui.request(priority_btns)
+
+        priority_btns = ft.Row([
+            ft.IconButton(icon=ft.Icons.CIRCLE_OUTLINED, icon_color=THEME["red"], data="red", tooltip="紧急",
+                          on_click=lambda e: set_priority("red")),
+            ft.IconButton(icon=ft.Icons.CIRCLE_OUTLINED, icon_color=THEME["orange"], data="orange", tooltip="重要",
+                          on_click=lambda e: set_priority("orange")),
+            ft.IconButton(icon=ft.Icons.CIRCLE, icon_color=THEME["green"], data="green", tooltip="日常",
+                          on_click=lambda e: set_priority("green"))
+        ], spacing=0)
+
+        lv_tasks = ft.ListView(expand=True, spacing=5)
+        txt_input_task = ft.TextField(
+            hint_text="输入待办...",
+            expand=True,
+            bgcolor=THEME["white"],
+            color=THEME["fg"],
+            border_radius=10,
+            border_color="transparent",
+            text_size=14,
+            content_padding=15
+        )
 
-    view_settings = ft.Container(
-        padding=ft.padding.only(left=20, right=20, top=20, bottom=160),
-        content=ft.Column([
-            ft.Text("猫窝设置 ⚙️", size=24, weight="bold", color=THEME["fg"]),
-            ft.Container(height=10), input_name, input_date, input_city, input_focus, input_break,
-            ft.Container(height=10),
-            ft.ElevatedButton("保存设置喵", on_click=save_settings, bgcolor=THEME["white"], color=THEME["fg"],
-                              width=120,
-                              elevation=2),
-            ft.Divider(color=THEME["fg"]),
-            btn_report,
-            ft.Container(height=5),
-            btn_history,
-            ft.Container(height=20),
-            ft.Container(content=btn_clear, alignment=ft.alignment.center),
-            get_watermark(),
-            ft.Container(height=30)
-        ], scroll="auto"))
+        empty_state = ft.Container(content=ft.Column(
+            [ft.Text("( =ω=)..zzZ", size=40, color="grey"), ft.Text("暂无任务，去晒太阳吧~ ☀️", color="grey")],
+            horizontal_alignment="center", alignment=ft.MainAxisAlignment.CENTER), alignment=ft.alignment.center,
+            padding=40)
+
+        def build_task_row(task_id, task_item):
+            text = task_item.text
+            prio = task_item.priority
+
+            p_icon = ft.Icon(ft.Icons.CIRCLE, size=12, color=PRIORITY_COLORS.get(prio, THEME["green"]))
+            display_content = [p_icon, ft.Text(text, size=14, color=THEME["fg"], expand=True)]
+            if prio == "red":
+                display_content.insert(1, ft.Text("🔥", size=12))
+
+            return ft.Container(
+                bgcolor=THEME["comp_bg"],
+                padding=12,
+                border_radius=8,
+                content=ft.Row([
+                    ft.Row(display_content, expand=True, spacing=10),
+                    ft.IconButton(icon="delete_outline", icon_color=THEME["fg"], icon_size=20,
+                                  on_click=lambda e, tid=task_id: delete_task(tid))
+                ])
+            )
+
+        task_rows = KeyedList(lv_tasks, build_task_row, empty=empty_state, lock=ui.lock)
+        urgent_first = False
+
+        @traced
+        def render_tasks():
+            task_rows.sync((t.id, t) for t in logic.iter_tasks(urgent_first=urgent_first))
+            ui.request(lv_tasks)
+
+        @traced
+        def toggle_task_sort(e):
+            nonlocal urgent_first
+            urgent_first = not urgent_first
+            btn_sort.icon_color = THEME["fg"] if urgent_first else "grey"
+            btn_sort.tooltip = "按紧急程度" if urgent_first else "按添加顺序"
+            ui.request(btn_sort)
+            render_tasks()
+
+        btn_sort = ft.IconButton(icon="sort", icon_color="grey", tooltip="按添加顺序", on_click=toggle_task_sort)
+
+        @traced
+        def add_task_e(e):
+            if txt_input_task.value:
+                task_obj = logic.add_task(txt_input_task.value, current_priority)
+                txt_input_task.value = ""
+                changed = task_rows.insert(task_obj.id, task_obj, at=logic.task_position(task_obj.id, urgent_first))
+                ui.request(txt_input_task)
+                if changed is not None:
+                    ui.request(changed)
+                refresh_urgent_ui()
+
+        @traced
+        def delete_task(task_id):
+            if logic.remove_task(task_id):
+                changed = task_rows.remove(task_id)
+                if changed is not None:
+                    ui.request(changed)
+                refresh_urgent_ui()
+
+        render_events();
+        render_tasks()
 
+        view_todo = ft.Container(
+            padding=ft.padding.only(left=20, right=20, top=20, bottom=160),
+            content=ft.Column([
+                ft.Row([
+                    ft.Text("鱼干清单 🐟", size=24, weight="bold", color=THEME["fg"]),
+                    ft.Row([
+                        btn_sort,
+                        ft.IconButton(icon="history", icon_color=THEME["fg"], tooltip="查看历史", on_click=show_history_e),
+                        ft.IconButton(icon="alarm_add", icon_color=THEME["fg"], tooltip="添加倒计时",
+                                      on_click=open_add_event_dialog)
+                    ])
+                ], alignment="space_between"),
+                lv_events,
+                ft.Divider(color=THEME["fg"], thickness=1, height=30),
+                ft.Container(content=lv_tasks, expand=True, bgcolor=THEME["bg"]),
+                ft.Container(content=ft.Row([ft.Text("重要程度:", size=12, color="grey"), priority_btns], alignment="end")),
+                ft.Row(
+                    [txt_input_task,
+                     ft.IconButton("add_circle", icon_color=THEME["fg"], icon_size=40, on_click=add_task_e)]),
+                get_watermark(),
+                ft.Container(height=30)
+            ]))
+        return view_todo
+
+    # ---------------- 猫窝设置页(首次切过去才构建) ----------------
+    def build_view_settings():
+        def create_input(label, val):
+            return ft.TextField(
+                label=label, value=val,
+                label_style=ft.TextStyle(color=THEME["fg"]),
+                color=THEME["fg"],
+                bgcolor=THEME["white"],
+                border_radius=10,
+                border_color="transparent",
+                cursor_color=THEME["fg"]
+            )
+
+        input_name = create_input("猎物名称", logic.data["target_name"])
+        input_date = create_input("狩猎日期", logic.data["target_date"])
+        input_city = create_input("地盘(城市)", logic.data.get("city", "郑州"))
+        input_focus = create_input("捕猎时长(分)", str(logic.data["focus_min"]))
+        input_break = create_input("舔毛时长(分)", str(logic.data["break_min"]))
+
+        @traced
+        def clear_stats_e(e):
+            logic.clear_daily_stats();
+            txt_tomato_stats.value = "今日渔获: (空空如也)";
+            page.snack_bar = ft.SnackBar(ft.Text("已清空，一切归零喵"), open=True);
+            ui.request()
+
+        @traced
+        def save_settings(e):
+            logic.update_settings(input_name.value, input_date.value, input_city.value, input_focus.value,
+                                  input_break.value)
+            txt_days_label.value = f"距离{input_name.value}还剩"
+            txt_days_num.value = f"{logic.get_main_days_left()}"
+            if not timer_running and not is_break_mode:
+                try:
+                    mins = int(logic.data["focus_min"])
+                except:
+                    mins = 25
+                txt_timer.value = f"{mins:02}:00"
+                nonlocal total_duration
+                total_duration = mins * 60
+                ring_timer.value = 1.0
+            txt_weather.value = "刷新中...";
+            page.snack_bar = ft.SnackBar(ft.Text("喵！设置保存成功！"), open=True);
+            ui.request()
+
+        heatmap_cache = {"model": None, "dlg": None, "years": {}}  # years: 年份 -> 那一年的热力图
+
+        def build_heatmap(model, year):
+            # 一次只画一年(最多 53 列 x 7 格)，其余年份点年份标签再画
+            start, series, pad = model["start"], model["series"], model["pad"]
+            first = max(0, date(year, 1, 1).toordinal() - start.toordinal())
+            last = min(model["days"] - 1, date(year, 12, 31).toordinal() - start.toordinal())
+            columns = []
+            for w in range((first + pad) // 7, (last + pad) // 7 + 1):
+                cells = []
+                for d, level in enumerate(model["weeks"][w]):
+                    i = w * 7 + d - pad
+                    if level < 0 or not first <= i <= last:
+                        cells.append(ft.Container(width=10, height=10))
+                    else:
+                        tip = f"{(start + timedelta(days=i)).isoformat()}: {series[i]}条鱼"
+                        cells.append(ft.Container(width=10, height=10, border_radius=2, bgcolor=HEAT_COLORS[level],
+                                                  tooltip=tip))
+                columns.append(ft.Column(cells, spacing=2))
+            # 最新的一周在最右边，打开时就滚到那里
+            return ft.Row(columns, spacing=2, scroll="auto", auto_scroll=True)
+
+        def select_heatmap_year(year):
+            model = heatmap_cache["model"]
+            years = heatmap_cache["years"]
+            if year not in years:
+                years[year] = build_heatmap(model, year)
+            holder, chips = heatmap_cache["holder"], heatmap_cache["chips"]
+            with ui.lock:
+                holder.content = years[year]
+            for chip in chips.controls:
+                chip.bgcolor = THEME["fg"] if chip.data == year else THEME["comp_bg"]
+                chip.content.color = THEME["white"] if chip.data == year else THEME["fg"]
+            ui.request(holder, chips)
+
+        def build_month_chart(model):
+            months = model["months"]
+            groups = [ft.BarChartGroup(x=i, bar_rods=[
+                ft.BarChartRod(from_y=0, to_y=total, width=max(2, 300 // max(len(months), 1) - 2),
+                               color=THEME["fg"] if total else "grey", tooltip=f"{label}: {total}条鱼",
+                               border_radius=2)]) for i, (label, total) in enumerate(months)]
+            # 月份多了只标每年一月
+            labels = [ft.ChartAxisLabel(value=i, label=ft.Text(label[2:] if len(months) <= 12 else label[:4],
+                                                               size=9, color="grey"))
+                      for i, (label, _) in enumerate(months) if len(months) <= 12 or label.endswith("-01")]
+            return ft.BarChart(bar_groups=groups, border=ft.border.all(1, "transparent"),
+                               left_axis=ft.ChartAxis(labels_size=0, show_labels=False),
+                               bottom_axis=ft.ChartAxis(labels=labels), height=140,
+                               tooltip_bgcolor=THEME["comp_bg"],
+                               max_y=max((t for _, t in months), default=5) + 2)
+
+        @traced
+        def show_heatmap(e):
+            model = logic.focus_model()
+            if heatmap_cache["model"] is not model:
+                chips = ft.Row([ft.Container(content=ft.Text(f"{y}年 {t}🐟", size=12, color=THEME["fg"]),
+                                             bgcolor=THEME["comp_bg"], border_radius=8, data=y,
+                                             padding=ft.padding.symmetric(horizontal=8, vertical=4),
+                                             on_click=lambda e: select_heatmap_year(e.control.data))
+                                for y, t in model["years"]], wrap=True, spacing=6, run_spacing=6)
+                holder = ft.Container()
+                content = ft.Column([
+                    ft.Text("📅 毛线球日历", size=18, weight="bold", color=THEME["fg"]),
+                    ft.Text(f"{model['days']}天里有{model['active_days']}天在抓鱼，一共{model['total']}条，"
+                            f"单日最多{model['peak']}条", size=12, color="grey"),
+                    chips,
+                    holder,
+                    ft.Text("每月小鱼干", size=13, weight="bold", color=THEME["fg"]),
+                    build_month_chart(model),
+                ], spacing=10, scroll="auto")
+                heatmap_cache["dlg"] = ft.AlertDialog(
+                    content=ft.Container(content=content, height=420, width=350, padding=10), bgcolor="white")
+                heatmap_cache.update(model=model, years={}, holder=holder, chips=chips)
+                select_heatmap_year(model["years"][-1][0])
+            ui.open_dialog(heatmap_cache["dlg"])
+
+        btn_report = ft.ElevatedButton("📊 查看狩猎周报", on_click=show_weekly_report, bgcolor=THEME["comp_bg"],
+                                       color=THEME["fg"], width=390, elevation=0)
+        btn_heatmap = ft.ElevatedButton("📅 毛线球日历", on_click=show_heatmap, bgcolor=THEME["comp_bg"],
+                                        color=THEME["fg"], width=390, elevation=0)
+
+        diag_body = ft.Column(spacing=4, scroll="auto", height=330)
+
+        def diag_row(cells, bold=False):
+            return ft.Row([ft.Text(str(c), size=12, width=62 if i else 90, color=THEME["fg"],
+                                   weight="bold" if bold else None) for i, c in enumerate(cells)], spacing=4)
+
+        def fill_diagnostics():
+            timer = timer_drift.summary()
+            snap = metrics.snapshot()
+            rows = [ft.Text(f"⏱️ 计时精度(最近 {timer['cycles']} 轮，毫秒)", size=14, weight="bold",
+                            color=THEME["fg"]),
+                    diag_row(["阶段", "p50", "p90", "p99", "最慢"], bold=True)]
+            for stage, label in TIMER_STAGE_NAMES.items():
+                p = timer[stage]
+                rows.append(diag_row([label] + ([p["p50"], p["p90"], p["p99"], p["max"]] if p else ["-"] * 4)))
+            handlers = sorted(tracer.summary()["handlers"].items(), key=lambda item: -item[1]["avg_ms"])[:5]
+            if handlers:
+                rows += [ft.Divider(color=THEME["fg"]),
+                         ft.Text("🐾 最慢的按钮(平均毫秒)", size=14, weight="bold", color=THEME["fg"]),
+                         diag_row(["处理函数", "次数", "平均", "存盘", "界面"], bold=True)]
+                rows += [diag_row([name, h["count"], h["avg_ms"], round(h.get("storage_ms_total", 0) / h["count"], 1),
+                                   round(h.get("ui_ms_total", 0) / h["count"], 1)]) for name, h in handlers]
+            batch = ui.stats()
+            save = snap.get("tomato_save_seconds", {}).get("")
+            weather = snap.get("tomato_weather_fetch_total", {})
+            rows += [
+                ft.Divider(color=THEME["fg"]),
+                ft.Text("🧶 其他", size=14, weight="bold", color=THEME["fg"]),
+                ft.Text(f"刷新请求 {batch['requested']} 次，实际发送 {batch['flushed']} 次(合并 {batch['coalesced']})",
+                        size=12, color="grey"),
+                ft.Text(f"存盘 {save['count']} 次，p50≤{save['quantiles']['p50']}s" if save else "还没存过盘",
+                        size=12, color="grey"),
+                ft.Text("存盘失败 " + str(sum(snap.get("tomato_save_failures_total", {}).values())) + " 次",
+                        size=12, color="grey"),
+                ft.Text("天气 " + ("，".join(f"{k or '全部'}: {v}" for k, v in weather.items()) or "还没拉过"),
+                        size=12, color="grey"),
+                ft.Text(f"在线会话 {snap['tomato_active_sessions'].get('', 0)}，线程 {threading.active_count()}",
+                        size=12, color="grey"),
+            ]
+            with ui.lock:
+                diag_body.controls = rows
+
+        def refresh_diagnostics(e):
+            fill_diagnostics()
+            ui.request(diag_body)
+
+        def toggle_profiling(e):
+            # 卡顿时打开，操作一会儿再关掉；关掉时会把攒下的结果写进报告目录
+            if e.control.value:
+                profiler.enable()
+            else:
+                profiler.disable()
+            txt_profile_dir.value = profile_hint()
+            ui.request(txt_profile_dir)
+
+        def profile_hint():
+            return f"报告写在 {os.path.abspath(profiler.report_dir)}" if profiler.enabled else ""
+
+        switch_profile = ft.Switch(label="记录性能档案", value=profiler.enabled, on_change=toggle_profiling,
+                                   active_color=THEME["fg"])
+        txt_profile_dir = ft.Text("", size=11, color="grey")
+
+        dlg_diag = ft.AlertDialog(title=ft.Text("🩺 猫猫体检"),
+                                  content=ft.Container(content=ft.Column([diag_body, switch_profile, txt_profile_dir],
+                                                                         tight=True, spacing=4), width=340),
+                                  actions=[ft.TextButton("再测一次", on_click=refresh_diagnostics),
+                                           ft.TextButton("关掉", on_click=lambda e: ui.close_dialog(dlg_diag))],
+                                  bgcolor=THEME["comp_bg"])
+
+        def show_diagnostics(e):
+            fill_diagnostics()
+            switch_profile.value = profiler.enabled  # 可能被环境变量或别的会话打开
+            txt_profile_dir.value = profile_hint()
+            ui.open_dialog(dlg_diag)
+
+        btn_diag = ft.TextButton("🩺 猫猫体检(计时精度等)", on_click=show_diagnostics,
+                                 style=ft.ButtonStyle(color="grey"))
+
+        btn_history = ft.ElevatedButton("📜 翻看日记本", on_click=show_history_e, bgcolor=THEME["white"],
+                                        color=THEME["fg"], width=390, elevation=2)
+        btn_clear = ft.TextButton("🗑️ 倒掉今日猫粮(清空数据)", on_click=clear_stats_e,
+                                  style=ft.ButtonStyle(color=THEME["fg"]))
+
+        view_settings = ft.Container(
+            padding=ft.padding.only(left=20, right=20, top=20, bottom=160),
+            content=ft.Column([
+                ft.Text("猫窝设置 ⚙️", size=24, weight="bold", color=THEME["fg"]),
+                ft.Container(height=10), input_name, input_date, input_city, input_focus, input_break,
+                ft.Container(height=10),
+                ft.ElevatedButton("保存设置喵", on_click=save_settings, bgcolor=THEME["white"], color=THEME["fg"],
+                                  width=120,
+                                  elevation=2),
+                ft.Divider(color=THEME["fg"]),
+                btn_report,
+                btn_heatmap,
+                ft.Container(height=5),
+                btn_history,
+                ft.Container(height=20),
+                ft.Container(content=btn_clear, alignment=ft.alignment.center),
+                ft.Container(content=btn_diag, alignment=ft.alignment.center),
+                get_watermark(),
+                ft.Container(height=30)
+            ], scroll="auto"))
+        return view_settings
+
+    # 三个页面都挂在 page 上，切换只改 visible；其余两页第一次访问时才构建
+    view_builders = [lambda: view_home, build_view_todo, build_view_settings]
+    views = {0: view_home}
+    current_view = 0
+
+    @traced
     def nav_change(e):
-        idx = e.control.selected_index;
-        page.controls.clear()
-        if idx == 0:
-            page.add(view_home)
-        elif idx == 1:
-            page.add(view_todo)
-        elif idx == 2:
-            page.add(view_settings)
-        page.add(nav_bar);
-        page.update()
+        nonlocal current_view
+        idx = e.control.selected_index
+        if idx == current_view:
+            return
+        t0 = time.perf_counter()
+        old_view = views[current_view]
+        old_view.visible = False
+        view = views.get(idx)
+        if view is None:
+            logic.loaded.wait()
+            view = view_builders[idx]()
+            views[idx] = view
+            with ui.lock:
+                page.controls.insert(len(page.controls) - 1, view)  # 放在导航栏前面
+            ui_stats["views_built"] += 1
+            ui.flush_now()
+        else:
+            view.visible = True
+            ui.flush_now(old_view, view)
+        current_view = idx
+        ui_stats["switches"] += 1
+        ui_stats["last_switch_ms"] = (time.perf_counter() - t0) * 1000
 
     nav_bar = ft.NavigationBar(
         destinations=[
@@ -1070,10 +2773,65 @@ def main(page: ft.Page):
         elevation=10
     )
 
-    page.add(view_home);
-    page.add(nav_bar);
+    with trace.phase("first page.add"):
+        page.add(view_home, nav_bar)
+    ui_stats["first_frame_ms"] = trace.elapsed_ms()
+
+    def reconcile_home():
+        """完整数据加载完后，把首页上按快照画的值校正一遍(通常一个都不变)"""
+        txt_days_label.value = f"距离{logic.data['target_name']}还剩"
+        txt_days_num.value = f"{logic.get_main_days_left()}"
+        txt_tomato_stats.value = f"今日渔获: {get_tomato_str()}"
+        ui.request(txt_days_label, txt_days_num, txt_tomato_stats)
+        if not timer_running and not is_break_mode and ring_timer.value == 1.0:
+            nonlocal total_duration
+            total_duration = logic.data["focus_min"] * 60
+            txt_timer.value = f"{logic.data['focus_min']}:00"
+            ui.request(txt_timer)
+        refresh_checkin_ui()
+        refresh_urgent_ui()
+
+    def warm_up():
+        # 首帧已经发出去了：先补齐完整数据，再慢慢导入可选依赖、挂上音频，最后才开始拉天气
+        if not logic.loaded.is_set():
+            with trace.phase("StudyLogic.load_data"):
+                logic.load_data()
+            reconcile_home()
+        refresh_next_event()  # 快照里没有倒计时，首帧时这一行先空着
+        warm_up_optional_imports()
+        start_metrics_exporters()
+        setup_audio()
+        trace.mark("audio ready")
+        dump_startup_trace(trace)
+        weather_loop_thread()
+
+    threading.Thread(target=warm_up, daemon=True).start()
+
+    # 🕛 换日：清零今日渔获，刷新签到按钮和所有倒计时，每天只做一次。
+    # 只在内存里清零，不存盘：所有会话共用一个数据文件，午夜时每个开着的会话都拿自己的旧副本写一遍，
+    # 会把别的会话刚存的任务、渔获盖掉；等用户下一次真正操作时再随之存下来
+    def on_new_day(today_str):
+        logic.roll_daily_counters()
+        txt_tomato_stats.value = f"今日渔获: {get_tomato_str()}"
+        ui.request(txt_tomato_stats)
+        refresh_checkin_ui()
+        refresh_event_days()
+        refresh_weekly_report()
+
+    def on_disconnect(e):
+        nonlocal timer_running, timer_generation
+        M_SESSIONS.dec()
+        session_closed.set()
+        # 计时线程下一次轮询(不到 0.1 秒)就退出，不会等到这一轮走完再拿旧数据记一个番茄、存盘
+        timer_running = False
+        timer_generation += 1
+        ui.close()
+        day_clock.unsubscribe(on_new_day)
 
-    threading.Thread(target=weather_loop_thread, daemon=True).start()
+    page.on_disconnect = on_disconnect
+    M_SESSIONS.inc()
+    day_clock.subscribe(on_new_day)
 
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
\ No newline at end of file